@@ -0,0 +1,93 @@
+"""
+Coupon embedding index for semantic re-ranking.
+
+Coupon text is static between ingestions, so the embeddings are computed once
+by `app.ingestion.ingest_coupons` and stored in a FAISS IndexFlatIP
+(L2-normalized vectors, inner product == cosine similarity). At query time
+only the question needs embedding; candidate scores come from the index.
+
+The flat index is loaded into a plain (N, D) float32 matrix, so scoring an
+FTS shortlist is one row gather plus one matrix-vector product rather than
+a search over the whole index.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger("multi_modal_retail.coupon_index")
+
+
+class CouponIndex:
+    """In-memory matrix of normalized coupon embeddings keyed by coupon ID."""
+
+    def __init__(self, vectors: np.ndarray, coupon_ids: List[str]):
+        self.vectors = vectors
+        self.coupon_ids = coupon_ids
+        self.row_by_coupon: Dict[str, int] = {
+            cid: row for row, cid in enumerate(coupon_ids)
+        }
+
+    @property
+    def dimension(self) -> int:
+        return self.vectors.shape[1]
+
+    def __contains__(self, coupon_id: str) -> bool:
+        return coupon_id in self.row_by_coupon
+
+    def score(self, query_vec: np.ndarray, coupon_ids: Sequence[str]) -> Dict[str, float]:
+        """
+        Inner-product scores of a normalized query vector against the given coupons.
+
+        Coupons missing from the index are omitted from the result.
+        """
+        present = [cid for cid in coupon_ids if cid in self.row_by_coupon]
+        if not present:
+            return {}
+
+        rows = [self.row_by_coupon[cid] for cid in present]
+        scores = self.vectors[rows] @ np.asarray(query_vec, dtype=np.float32)
+        return dict(zip(present, scores.tolist()))
+
+
+def load_coupon_index(index_path: Path, meta_path: Path) -> Optional[CouponIndex]:
+    """
+    Load the coupon FAISS index and its coupon_id metadata.
+
+    Returns None when FAISS is unavailable, the files are missing, or the
+    metadata does not describe coupons (e.g. the path holds a manuals index).
+    """
+    if not index_path.exists() or not meta_path.exists():
+        logger.info(f"Coupon index not found at {index_path}; embedding candidates per request")
+        return None
+
+    try:
+        import faiss
+    except ImportError:
+        logger.warning("FAISS not installed; embedding candidates per request")
+        return None
+
+    try:
+        with open(meta_path, "r") as f:
+            metadata = json.load(f)
+        coupon_ids = [str(entry["coupon_id"]) for entry in metadata]
+        index = faiss.read_index(str(index_path))
+        vectors = index.reconstruct_n(0, index.ntotal)
+    except (KeyError, TypeError):
+        logger.warning(f"{meta_path} does not contain coupon metadata; ignoring index")
+        return None
+    except Exception as e:
+        logger.error(f"Failed to load coupon index: {e}")
+        return None
+
+    if index.ntotal != len(coupon_ids):
+        logger.warning(
+            f"Coupon index size mismatch: {index.ntotal} vectors, {len(coupon_ids)} metadata rows"
+        )
+        return None
+
+    logger.info(f"Loaded coupon index: {index.ntotal} coupons, dimension {index.d}")
+    return CouponIndex(np.ascontiguousarray(vectors, dtype=np.float32), coupon_ids)
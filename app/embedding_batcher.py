@@ -0,0 +1,177 @@
+"""
+Micro-batching for OpenAI embedding requests.
+
+Concurrent searches each need a handful of embeddings. Instead of one HTTP
+call per request, callers enqueue their texts and a single worker coroutine
+coalesces everything that arrives within a short window (default 15 ms)
+into one `embeddings.create` call per model, then hands each caller its
+slice of the response. Batches are dispatched as tasks (at most
+max_concurrency in flight), so one slow call does not hold up the next
+window, and each call is failed after `timeout` seconds.
+
+EmbeddingCache keeps recently used vectors in process so content that has
+not changed (e.g. coupon text) is not re-embedded on every search.
+quantize_int8/dequantize_int8 shrink vectors 4x for persistent storage.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+import numpy as np
+from openai import AsyncOpenAI
+
+logger = logging.getLogger("multi_modal_retail.embedding_batcher")
+
+# (model, texts, future resolved with one embedding per text)
+_Pending = Tuple[str, List[str], asyncio.Future]
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent embedding requests into batched OpenAI calls."""
+
+    def __init__(
+        self,
+        client_factory: Callable[[], AsyncOpenAI],
+        window_ms: float = 15.0,
+        max_batch: int = 256,
+        max_concurrency: int = 8,
+        timeout: float = 5.0,
+    ):
+        """
+        Args:
+            client_factory: Returns the AsyncOpenAI client (called per batch)
+            window_ms: How long to wait for more requests after the first arrives
+            max_batch: Flush early once this many texts are pending
+            max_concurrency: Most embeddings calls in flight at once
+            timeout: Seconds before a call (including SDK retries) is failed
+        """
+        self.client_factory = client_factory
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        # Strong references so in-flight dispatches are not garbage collected
+        self._in_flight: Set[asyncio.Task] = set()
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        """Start the worker on the running loop if it is not already running."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._worker = loop.create_task(self._run())
+        return self._queue
+
+    async def embed(self, texts: List[str], model: str) -> List[List[float]]:
+        """Embed texts, sharing the OpenAI call with other concurrent callers."""
+        if not texts:
+            return []
+        queue = self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((model, list(texts), future))
+        return await future
+
+    async def _run(self) -> None:
+        """Drain the queue in windows and dispatch one call per model as a task."""
+        loop = asyncio.get_running_loop()
+        slots = self._slots
+        while True:
+            batch: List[_Pending] = [await self._queue.get()]
+            pending_texts = len(batch[0][1])
+            deadline = loop.time() + self.window
+
+            while pending_texts < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                pending_texts += len(item[1])
+
+            by_model: Dict[str, List[_Pending]] = {}
+            for item in batch:
+                by_model.setdefault(item[0], []).append(item)
+
+            for model, items in by_model.items():
+                # Waiting for a slot lets the queue fill, so the next batch is bigger
+                await slots.acquire()
+                task = loop.create_task(self._dispatch(model, items))
+                self._in_flight.add(task)
+                task.add_done_callback(self._in_flight.discard)
+                task.add_done_callback(lambda _: slots.release())
+
+    async def _dispatch(self, model: str, items: List[_Pending]) -> None:
+        """Send one embeddings request for all items and resolve their futures."""
+        inputs = [text for _, texts, _ in items for text in texts]
+        try:
+            client = self.client_factory()
+            resp = await asyncio.wait_for(
+                client.embeddings.create(
+                    model=model, input=inputs, timeout=self.timeout
+                ),
+                self.timeout,
+            )
+            embeddings = [item.embedding for item in resp.data]
+        except Exception as e:
+            for _, _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if len(items) > 1:
+            logger.debug(f"Batched {len(items)} embedding requests ({len(inputs)} texts)")
+
+        offset = 0
+        for _, texts, future in items:
+            if not future.done():
+                future.set_result(embeddings[offset : offset + len(texts)])
+            offset += len(texts)
+
+
+class EmbeddingCache:
+    """
+    Bounded LRU cache of embedding vectors.
+
+    Keys should include everything the vector depends on (model and the
+    embedded text), so edited content naturally misses instead of going stale.
+    """
+
+    def __init__(self, maxsize: int = 5000):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, np.ndarray]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[np.ndarray]:
+        vec = self._entries.get(key)
+        if vec is not None:
+            self._entries.move_to_end(key)
+        return vec
+
+    def put(self, key: Hashable, vec: np.ndarray) -> None:
+        self._entries[key] = vec
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+def quantize_int8(vec: np.ndarray) -> Tuple[bytes, float]:
+    """Symmetric per-vector int8 quantization; returns (int8 bytes, scale)."""
+    scale = float(np.abs(vec).max()) / 127.0 or 1.0
+    return np.round(vec / scale).astype(np.int8).tobytes(), scale
+
+
+def dequantize_int8(data: bytes, scale: float) -> np.ndarray:
+    """Float32 vector from quantize_int8 output (bytes or memoryview)."""
+    return np.frombuffer(data, dtype=np.int8).astype(np.float32) * np.float32(scale)
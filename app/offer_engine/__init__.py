@@ -10,7 +10,7 @@ import logging
 from .config import OfferEngineConfig
 from .time_service import TimeService
 from .expiration_handler import ExpirationHandler
-from .cycle_manager import OfferCycleManager
+from .cycle_manager import OfferCycleManager, invalidate_cycle_cache
 from .offer_assigner import OfferAssigner
 from .scheduler import OfferScheduler
 
@@ -40,25 +40,33 @@ def reset_singletons() -> None:
     _config = None
     _time_service = None
     _scheduler = None
+    invalidate_cycle_cache()
     logger.info("Offer engine singletons reset")
 
 
 def get_time_service(db=None) -> TimeService:
-    """Get or create the time service."""
+    """Get the shared time service, as a view bound to db when one is given."""
     global _time_service
     if _time_service is None:
-        _time_service = TimeService(get_config(), db)
-    return _time_service
+        _time_service = TimeService(get_config())
+    if db is None:
+        return _time_service
+    return _time_service.for_session(db)
 
 
 def get_scheduler(db=None) -> OfferScheduler:
-    """Get or create the offer scheduler."""
+    """Get the shared offer scheduler, as a view bound to db when one is given.
+
+    The singletons hold simulation state across requests, but sessions are
+    request-scoped, so each caller gets its own view over that state rather
+    than rebinding the shared instances.
+    """
     global _scheduler
     if _scheduler is None:
-        config = get_config()
-        time_service = get_time_service(db)
-        _scheduler = OfferScheduler(config, time_service, db)
-    return _scheduler
+        _scheduler = OfferScheduler(get_config(), get_time_service(), None)
+    if db is None:
+        return _scheduler
+    return _scheduler.for_session(db)
 
 
 def is_simulation_mode() -> bool:
@@ -76,6 +84,7 @@ __all__ = [
     "get_config",
     "get_time_service",
     "get_scheduler",
+    "invalidate_cycle_cache",
     "is_simulation_mode",
     "reset_singletons",
 ]
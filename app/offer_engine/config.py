@@ -6,9 +6,29 @@ Configuration dataclass with environment variable loading.
 
 import os
 from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict
 
 
-@dataclass
+@lru_cache(maxsize=1)
+def _env_settings() -> Dict[str, Any]:
+    """Parse offer engine environment variables (once per process)."""
+    return {
+        "simulation_mode": os.getenv("SIMULATION_MODE", "false").lower() == "true",
+        "time_scale": float(os.getenv("TIME_SCALE", "168")),
+        "cycle_duration_days": int(os.getenv("OFFER_CYCLE_DAYS", "7")),
+        "offer_expiration_days": int(os.getenv("OFFER_EXPIRATION_DAYS", "14")),
+        "max_wallet_capacity": int(os.getenv("MAX_WALLET_CAPACITY", "32")),
+        "frontstore_per_cycle": int(os.getenv("FRONTSTORE_PER_CYCLE", "2")),
+        "category_brand_per_cycle": int(os.getenv("CATEGORY_BRAND_PER_CYCLE", "30")),
+        "frontstore_pool_size": int(os.getenv("FRONTSTORE_POOL_SIZE", "50")),
+        "category_brand_pool_size": int(os.getenv("CATEGORY_BRAND_POOL_SIZE", "150")),
+        "refresh_cooldown_seconds": int(os.getenv("REFRESH_COOLDOWN_SECONDS", "30")),
+        "expiration_batch_size": int(os.getenv("EXPIRATION_BATCH_SIZE", "5000")),
+    }
+
+
+@dataclass(slots=True)
 class OfferEngineConfig:
     """Configuration for the offer engine."""
 
@@ -32,21 +52,17 @@ class OfferEngineConfig:
     # Refresh settings
     refresh_cooldown_seconds: int = 30
 
+    # Rows expired per transaction in the global expiration sweep
+    expiration_batch_size: int = 5000
+
     @classmethod
     def from_env(cls) -> "OfferEngineConfig":
-        """Create config from environment variables."""
-        return cls(
-            simulation_mode=os.getenv("SIMULATION_MODE", "false").lower() == "true",
-            time_scale=float(os.getenv("TIME_SCALE", "168")),
-            cycle_duration_days=int(os.getenv("OFFER_CYCLE_DAYS", "7")),
-            offer_expiration_days=int(os.getenv("OFFER_EXPIRATION_DAYS", "14")),
-            max_wallet_capacity=int(os.getenv("MAX_WALLET_CAPACITY", "32")),
-            frontstore_per_cycle=int(os.getenv("FRONTSTORE_PER_CYCLE", "2")),
-            category_brand_per_cycle=int(os.getenv("CATEGORY_BRAND_PER_CYCLE", "30")),
-            frontstore_pool_size=int(os.getenv("FRONTSTORE_POOL_SIZE", "50")),
-            category_brand_pool_size=int(os.getenv("CATEGORY_BRAND_POOL_SIZE", "150")),
-            refresh_cooldown_seconds=int(os.getenv("REFRESH_COOLDOWN_SECONDS", "30")),
-        )
+        """Create config from environment variables.
+
+        The environment is parsed once per process; each call still returns a
+        new instance because callers adjust fields such as time_scale at runtime.
+        """
+        return cls(**_env_settings())
 
     def get_simulated_cycle_duration_hours(self) -> float:
         """Get cycle duration in real hours (for simulation)."""
@@ -5,9 +5,10 @@ Manages offer cycle lifecycle.
 """
 
 import logging
+import time
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 from uuid import uuid4
 
 from sqlalchemy import text
@@ -18,6 +19,64 @@ from .time_service import TimeService
 
 logger = logging.getLogger(__name__)
 
+CURRENT_CYCLE_SQL = text("""
+    SELECT id, cycle_number, started_at, ends_at,
+           simulated_start_date, simulated_end_date
+    FROM offer_cycles
+    WHERE is_simulation = true
+      AND started_at <= :now
+      AND ends_at > :now
+    ORDER BY cycle_number DESC
+    LIMIT 1
+""")
+
+NEXT_CYCLE_NUMBER_SQL = text("""
+    SELECT COALESCE(MAX(cycle_number), 0) + 1 as next_num
+    FROM offer_cycles
+    WHERE is_simulation = true
+""")
+
+INSERT_CYCLE_SQL = text("""
+    INSERT INTO offer_cycles
+        (id, cycle_number, started_at, ends_at, simulated_start_date, simulated_end_date, is_simulation)
+    VALUES
+        (:id, :num, :start, :end, :sim_start, :sim_end, true)
+""")
+
+USER_CYCLE_STATE_SQL = text("""
+    SELECT user_id, current_cycle_id, last_refresh_at, next_refresh_at
+    FROM user_offer_cycles
+    WHERE user_id = :uid AND is_simulation = true
+""")
+
+UPSERT_USER_REFRESH_SQL = text("""
+    INSERT INTO user_offer_cycles
+        (user_id, current_cycle_id, last_refresh_at, next_refresh_at, is_simulation)
+    VALUES
+        (:uid, :cid, :now, :next, true)
+    ON CONFLICT (user_id) DO UPDATE SET
+        current_cycle_id = :cid,
+        last_refresh_at = :now,
+        next_refresh_at = :next,
+        updated_at = NOW()
+""")
+
+BULK_UPSERT_USER_REFRESH_SQL = text("""
+    INSERT INTO user_offer_cycles
+        (user_id, current_cycle_id, last_refresh_at, next_refresh_at, is_simulation)
+    SELECT uid, :cid, :now, :next, true
+    FROM unnest(CAST(:uids AS uuid[])) AS uid
+    ON CONFLICT (user_id) DO UPDATE SET
+        current_cycle_id = :cid,
+        last_refresh_at = :now,
+        next_refresh_at = :next,
+        updated_at = NOW()
+""")
+
+# Real seconds a cached current cycle is trusted before re-checking the
+# database (bounds staleness when another worker resets the simulation)
+CYCLE_CACHE_TTL_SECONDS = 60.0
+
 
 @dataclass
 class OfferCycle:
@@ -30,6 +89,43 @@ class OfferCycle:
     simulated_end_date: Optional[str]
 
 
+# Per-process cache of the active cycle: (cycle, monotonic time cached)
+_current_cycle: Optional[tuple] = None
+
+# Per-process cache of each user's next_refresh_at, so users who are not yet
+# due skip the user_offer_cycles lookup entirely:
+# user_id -> (next_refresh_at, monotonic time cached). Entries expire after
+# CYCLE_CACHE_TTL_SECONDS so another worker's refresh or reset is seen.
+_next_refresh_cache: Dict[str, Tuple[datetime, float]] = {}
+NEXT_REFRESH_CACHE_MAX_USERS = 50000
+
+
+def invalidate_cycle_cache() -> None:
+    """Forget cached cycle and refresh state (after cycles are created or cleared)."""
+    global _current_cycle
+    _current_cycle = None
+    _next_refresh_cache.clear()
+
+
+def _cache_next_refresh(user_id: str, next_refresh_at: datetime) -> None:
+    """Remember a user's next refresh time (cache is dropped wholesale when full)."""
+    if len(_next_refresh_cache) >= NEXT_REFRESH_CACHE_MAX_USERS:
+        _next_refresh_cache.clear()
+    _next_refresh_cache[user_id] = (next_refresh_at, time.monotonic())
+
+
+def _cached_next_refresh(user_id: str) -> Optional[datetime]:
+    """A user's cached next refresh time, if cached within CYCLE_CACHE_TTL_SECONDS."""
+    entry = _next_refresh_cache.get(user_id)
+    if entry is None:
+        return None
+    next_refresh_at, cached_at = entry
+    if time.monotonic() - cached_at >= CYCLE_CACHE_TTL_SECONDS:
+        _next_refresh_cache.pop(user_id, None)
+        return None
+    return next_refresh_at
+
+
 @dataclass
 class UserCycleState:
     """User's cycle state."""
@@ -48,23 +144,27 @@ class OfferCycleManager:
         self.db = db
 
     def get_or_create_current_cycle(self) -> OfferCycle:
-        """Get active cycle or create new one."""
+        """Get active cycle or create new one.
+
+        The active cycle is cached per process until it ends (in simulated
+        time) or CYCLE_CACHE_TTL_SECONDS pass, whichever comes first.
+        """
+        global _current_cycle
         current_time = self.time_service.now()
 
+        if _current_cycle is not None:
+            cycle, cached_at = _current_cycle
+            if (
+                time.monotonic() - cached_at < CYCLE_CACHE_TTL_SECONDS
+                and cycle.started_at <= current_time < cycle.ends_at
+            ):
+                return cycle
+
         # Find active cycle
-        result = self.db.execute(text("""
-            SELECT id, cycle_number, started_at, ends_at,
-                   simulated_start_date, simulated_end_date
-            FROM offer_cycles
-            WHERE is_simulation = true
-              AND started_at <= :now
-              AND ends_at > :now
-            ORDER BY cycle_number DESC
-            LIMIT 1
-        """), {"now": current_time}).fetchone()
+        result = self.db.execute(CURRENT_CYCLE_SQL, {"now": current_time}).fetchone()
 
         if result:
-            return OfferCycle(
+            cycle = OfferCycle(
                 id=str(result.id),
                 cycle_number=result.cycle_number,
                 started_at=result.started_at,
@@ -72,20 +172,19 @@ class OfferCycleManager:
                 simulated_start_date=str(result.simulated_start_date) if result.simulated_start_date else None,
                 simulated_end_date=str(result.simulated_end_date) if result.simulated_end_date else None,
             )
+        else:
+            # Create new cycle
+            cycle = self.create_new_cycle()
 
-        # Create new cycle
-        return self.create_new_cycle()
+        _current_cycle = (cycle, time.monotonic())
+        return cycle
 
     def create_new_cycle(self) -> OfferCycle:
         """Create a new offer cycle."""
         current_time = self.time_service.now()
 
         # Get next cycle number
-        result = self.db.execute(text("""
-            SELECT COALESCE(MAX(cycle_number), 0) + 1 as next_num
-            FROM offer_cycles
-            WHERE is_simulation = true
-        """)).fetchone()
+        result = self.db.execute(NEXT_CYCLE_NUMBER_SQL).fetchone()
         next_number = result.next_num
 
         cycle_id = str(uuid4())
@@ -98,12 +197,7 @@ class OfferCycleManager:
             from datetime import timedelta
             sim_end = sim_start + timedelta(days=self.config.cycle_duration_days)
 
-        self.db.execute(text("""
-            INSERT INTO offer_cycles
-                (id, cycle_number, started_at, ends_at, simulated_start_date, simulated_end_date, is_simulation)
-            VALUES
-                (:id, :num, :start, :end, :sim_start, :sim_end, true)
-        """), {
+        self.db.execute(INSERT_CYCLE_SQL, {
             "id": cycle_id,
             "num": next_number,
             "start": current_time,
@@ -112,6 +206,7 @@ class OfferCycleManager:
             "sim_end": sim_end,
         })
         self.db.commit()
+        invalidate_cycle_cache()
 
         logger.info(f"Created cycle {next_number}: {current_time} to {ends_at}")
 
@@ -126,11 +221,7 @@ class OfferCycleManager:
 
     def get_user_cycle_state(self, user_id: str) -> Optional[UserCycleState]:
         """Get user's current refresh state."""
-        result = self.db.execute(text("""
-            SELECT user_id, current_cycle_id, last_refresh_at, next_refresh_at
-            FROM user_offer_cycles
-            WHERE user_id = :uid AND is_simulation = true
-        """), {"uid": user_id}).fetchone()
+        result = self.db.execute(USER_CYCLE_STATE_SQL, {"uid": user_id}).fetchone()
 
         if not result:
             return None
@@ -144,6 +235,11 @@ class OfferCycleManager:
 
     def should_refresh_user_offers(self, user_id: str) -> bool:
         """Check if user needs offer refresh."""
+        now = self.time_service.now()
+        cached_next = _cached_next_refresh(user_id)
+        if cached_next is not None and now < cached_next:
+            return False
+
         state = self.get_user_cycle_state(user_id)
 
         if not state:
@@ -153,28 +249,39 @@ class OfferCycleManager:
         if not state.next_refresh_at:
             return True
 
-        return self.time_service.now() >= state.next_refresh_at
+        _cache_next_refresh(user_id, state.next_refresh_at)
+        return now >= state.next_refresh_at
 
     def update_user_refresh_time(self, user_id: str, cycle_id: str) -> None:
-        """Update user's refresh state."""
+        """Update user's refresh state, committing the refresh transaction."""
         current_time = self.time_service.now()
         next_refresh = self.time_service.get_cycle_end_time(current_time)
 
         # Upsert user_offer_cycles
-        self.db.execute(text("""
-            INSERT INTO user_offer_cycles
-                (user_id, current_cycle_id, last_refresh_at, next_refresh_at, is_simulation)
-            VALUES
-                (:uid, :cid, :now, :next, true)
-            ON CONFLICT (user_id) DO UPDATE SET
-                current_cycle_id = :cid,
-                last_refresh_at = :now,
-                next_refresh_at = :next,
-                updated_at = NOW()
-        """), {
+        self.db.execute(UPSERT_USER_REFRESH_SQL, {
             "uid": user_id,
             "cid": cycle_id,
             "now": current_time,
             "next": next_refresh,
         })
         self.db.commit()
+        _cache_next_refresh(user_id, next_refresh)
+
+    def update_user_refresh_times(self, user_ids: List[str], cycle_id: str) -> None:
+        """update_user_refresh_time for many users in one upsert."""
+        if not user_ids:
+            self.db.commit()
+            return
+
+        current_time = self.time_service.now()
+        next_refresh = self.time_service.get_cycle_end_time(current_time)
+
+        self.db.execute(BULK_UPSERT_USER_REFRESH_SQL, {
+            "uids": list(user_ids),
+            "cid": cycle_id,
+            "now": current_time,
+            "next": next_refresh,
+        })
+        self.db.commit()
+        for user_id in user_ids:
+            _cache_next_refresh(user_id, next_refresh)
@@ -16,6 +16,45 @@ from .time_service import TimeService
 
 logger = logging.getLogger(__name__)
 
+EXPIRE_DUE_FOR_USER_SQL = text("""
+    UPDATE user_coupons
+    SET status = 'expired'
+    WHERE user_id = :uid
+      AND status = 'active'
+      AND is_simulation = true
+      AND eligible_until <= :now
+""")
+
+EXPIRE_DUE_BATCH_SQL = text("""
+    UPDATE user_coupons
+    SET status = 'expired'
+    WHERE id IN (
+        SELECT id FROM user_coupons
+        WHERE status = 'active'
+          AND is_simulation = true
+          AND eligible_until <= :now
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+""")
+
+EXPIRE_ALL_FOR_USER_SQL = text("""
+    UPDATE user_coupons
+    SET status = 'expired'
+    WHERE user_id = :uid
+      AND status = 'active'
+      AND is_simulation = true
+""")
+
+EXPIRATION_STATS_SQL = text("""
+    SELECT
+        status,
+        COUNT(*) as count
+    FROM user_coupons
+    WHERE user_id = :uid AND is_simulation = true
+    GROUP BY status
+""")
+
 
 @dataclass
 class ExpirationResult:
@@ -42,31 +81,14 @@ class ExpirationHandler:
         if user_id:
             # Process for specific user
             result = self.db.execute(
-                text("""
-                UPDATE user_coupons
-                SET status = 'expired'
-                WHERE user_id = :uid
-                  AND status = 'active'
-                  AND is_simulation = true
-                  AND eligible_until <= :now
-            """),
+                EXPIRE_DUE_FOR_USER_SQL,
                 {"uid": user_id, "now": current_time},
             )
+            self.db.commit()
+            count = result.rowcount
         else:
-            # Process all simulation users
-            result = self.db.execute(
-                text("""
-                UPDATE user_coupons
-                SET status = 'expired'
-                WHERE status = 'active'
-                  AND is_simulation = true
-                  AND eligible_until <= :now
-            """),
-                {"now": current_time},
-            )
-
-        self.db.commit()
-        count = result.rowcount
+            # Process all simulation users in bounded batches
+            count = self._expire_all_in_batches(current_time)
 
         if count > 0:
             logger.info(
@@ -75,16 +97,28 @@ class ExpirationHandler:
 
         return ExpirationResult(expired_count=count, user_id=user_id)
 
+    def _expire_all_in_batches(self, current_time) -> int:
+        """Expire due simulation offers for all users, committing per batch.
+
+        Keeps row locks and WAL per transaction bounded; SKIP LOCKED lets
+        concurrent per-user refreshes proceed instead of waiting on the sweep.
+        """
+        batch_size = self.config.expiration_batch_size
+        total = 0
+        while True:
+            result = self.db.execute(
+                EXPIRE_DUE_BATCH_SQL,
+                {"now": current_time, "batch_size": batch_size},
+            )
+            self.db.commit()
+            total += result.rowcount
+            if result.rowcount < batch_size:
+                return total
+
     def expire_all_for_user(self, user_id: str) -> int:
         """Expire ALL active offers for a user (used in weekly refresh)."""
         result = self.db.execute(
-            text("""
-            UPDATE user_coupons
-            SET status = 'expired'
-            WHERE user_id = :uid
-              AND status = 'active'
-              AND is_simulation = true
-        """),
+            EXPIRE_ALL_FOR_USER_SQL,
             {"uid": user_id},
         )
 
@@ -96,14 +130,7 @@ class ExpirationHandler:
     def get_expiration_stats(self, user_id: str) -> dict:
         """Get expiration statistics for a user."""
         result = self.db.execute(
-            text("""
-            SELECT
-                status,
-                COUNT(*) as count
-            FROM user_coupons
-            WHERE user_id = :uid AND is_simulation = true
-            GROUP BY status
-        """),
+            EXPIRATION_STATS_SQL,
             {"uid": user_id},
         ).fetchall()
 
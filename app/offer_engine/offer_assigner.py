@@ -7,7 +7,7 @@ Pool-based random offer assignment with separate frontstore and category/brand p
 import logging
 from dataclasses import dataclass
 from datetime import timedelta
-from typing import List
+from typing import Dict, List, Set, Tuple
 
 from sqlalchemy import text
 from sqlalchemy.orm import Session
@@ -18,6 +18,158 @@ from .expiration_handler import ExpirationHandler
 
 logger = logging.getLogger(__name__)
 
+# Per-user refresh lock, held until the assignment transaction commits
+TRY_USER_REFRESH_LOCK_SQL = text(
+    "SELECT pg_try_advisory_xact_lock(hashtextextended(:uid, 0))"
+)
+
+# Expires the user's active offers, drops stale simulation rows for the new
+# picks and selects both pools in one statement. All CTEs read the snapshot
+# taken at statement start, so "recent" is unaffected by the expiry; rows
+# still active in that snapshot are left for the expiry rather than deleted
+# (modifying one row from two CTEs is undefined). Coupons still active in the
+# snapshot are therefore excluded from the picks whatever their age: their
+# rows survive this statement and would make the INSERT skip them.
+PICK_WEEKLY_OFFERS_SQL = text("""
+    WITH expired AS (
+        UPDATE user_coupons
+        SET status = 'expired'
+        WHERE user_id = :uid
+          AND status = 'active'
+          AND is_simulation = true
+        RETURNING 1
+    ),
+    recent AS (
+        SELECT coupon_id
+        FROM user_coupons
+        WHERE user_id = :uid
+          AND is_simulation = true
+          AND (assigned_at > :threshold OR status = 'active')
+    ),
+    frontstore AS (
+        SELECT c.id FROM coupons c
+        WHERE c.type = 'frontstore'
+          AND NOT EXISTS (SELECT 1 FROM recent r WHERE r.coupon_id = c.id)
+        ORDER BY RANDOM()
+        LIMIT :frontstore_limit
+    ),
+    category_brand AS (
+        SELECT c.id FROM coupons c
+        WHERE c.type IN ('category', 'brand')
+          AND NOT EXISTS (SELECT 1 FROM recent r WHERE r.coupon_id = c.id)
+        ORDER BY RANDOM()
+        LIMIT :category_brand_limit
+    ),
+    picks AS (
+        SELECT id, 'frontstore' AS pool FROM frontstore
+        UNION ALL
+        SELECT id, 'category_brand' AS pool FROM category_brand
+    ),
+    stale AS (
+        -- Allows re-assignment after the 28-day exclusion window
+        DELETE FROM user_coupons
+        WHERE user_id = :uid
+          AND is_simulation = true
+          AND status <> 'active'
+          AND coupon_id IN (SELECT id FROM picks)
+    )
+    SELECT e.expired_count, p.id::text AS coupon_id, p.pool
+    FROM (SELECT COUNT(*) AS expired_count FROM expired) e
+    LEFT JOIN picks p ON true
+""")
+
+# One bind for the whole id list, so the statement text (and its cached
+# compilation and plan) is the same for any number of coupons
+INSERT_ASSIGNMENTS_SQL = text("""
+    INSERT INTO user_coupons
+        (user_id, coupon_id, status, offer_cycle_id, is_simulation, eligible_until, assigned_at)
+    SELECT :uid, cid, 'active', :cycle, true, :exp, :assigned_at
+    FROM unnest(CAST(:cids AS uuid[])) AS cid
+    ON CONFLICT (user_id, coupon_id) DO NOTHING
+    RETURNING coupon_id::text
+""")
+
+# PICK_WEEKLY_OFFERS_SQL for many users at once. Users another worker is
+# refreshing are skipped (the lock CTE is materialized so each lock is tried
+# exactly once); every locked user gets one row even with no picks.
+BULK_PICK_WEEKLY_OFFERS_SQL = text("""
+    WITH locked AS MATERIALIZED (
+        SELECT uid AS user_id
+        FROM (SELECT DISTINCT unnest(CAST(:uids AS uuid[])) AS uid) u
+        WHERE pg_try_advisory_xact_lock(hashtextextended(uid::text, 0))
+    ),
+    expired AS (
+        UPDATE user_coupons uc
+        SET status = 'expired'
+        FROM locked l
+        WHERE uc.user_id = l.user_id
+          AND uc.status = 'active'
+          AND uc.is_simulation = true
+        RETURNING uc.user_id
+    ),
+    expired_counts AS (
+        SELECT user_id, COUNT(*) AS expired_count FROM expired GROUP BY user_id
+    ),
+    recent AS (
+        SELECT user_id, coupon_id
+        FROM user_coupons
+        WHERE user_id IN (SELECT user_id FROM locked)
+          AND is_simulation = true
+          AND (assigned_at > :threshold OR status = 'active')
+    ),
+    picks AS (
+        SELECT l.user_id, f.id, 'frontstore' AS pool
+        FROM locked l
+        CROSS JOIN LATERAL (
+            SELECT c.id FROM coupons c
+            WHERE c.type = 'frontstore'
+              AND NOT EXISTS (
+                  SELECT 1 FROM recent r
+                  WHERE r.user_id = l.user_id AND r.coupon_id = c.id
+              )
+            ORDER BY RANDOM()
+            LIMIT :frontstore_limit
+        ) f
+        UNION ALL
+        SELECT l.user_id, cb.id, 'category_brand' AS pool
+        FROM locked l
+        CROSS JOIN LATERAL (
+            SELECT c.id FROM coupons c
+            WHERE c.type IN ('category', 'brand')
+              AND NOT EXISTS (
+                  SELECT 1 FROM recent r
+                  WHERE r.user_id = l.user_id AND r.coupon_id = c.id
+              )
+            ORDER BY RANDOM()
+            LIMIT :category_brand_limit
+        ) cb
+    ),
+    stale AS (
+        DELETE FROM user_coupons uc
+        USING picks p
+        WHERE uc.user_id = p.user_id
+          AND uc.coupon_id = p.id
+          AND uc.is_simulation = true
+          AND uc.status <> 'active'
+    )
+    SELECT l.user_id::text AS user_id,
+           COALESCE(e.expired_count, 0) AS expired_count,
+           p.id::text AS coupon_id,
+           p.pool
+    FROM locked l
+    LEFT JOIN expired_counts e ON e.user_id = l.user_id
+    LEFT JOIN picks p ON p.user_id = l.user_id
+""")
+
+BULK_INSERT_ASSIGNMENTS_SQL = text("""
+    INSERT INTO user_coupons
+        (user_id, coupon_id, status, offer_cycle_id, is_simulation, eligible_until, assigned_at)
+    SELECT a.user_id, a.coupon_id, 'active', :cycle, true, :exp, :assigned_at
+    FROM unnest(CAST(:uids AS uuid[]), CAST(:cids AS uuid[])) AS a(user_id, coupon_id)
+    ON CONFLICT (user_id, coupon_id) DO NOTHING
+    RETURNING user_id::text, coupon_id::text
+""")
+
 
 @dataclass
 class AssignmentResult:
@@ -30,6 +182,7 @@ class AssignmentResult:
     category_brand_assigned: int
     total_assigned: int
     errors: List[str]
+    in_progress: bool = False
 
 
 class OfferAssigner:
@@ -51,131 +204,171 @@ class OfferAssigner:
         """Full weekly assignment: expire old, assign new."""
         errors = []
 
-        # 1. Expire ALL active offers for user
-        expired_count = self.expiration_handler.expire_all_for_user(user_id)
-
-        # 2. Get recently assigned coupon IDs to exclude (exclude expired offers too)
-        exclude_ids = self._get_recent_coupon_ids(user_id)
-
-        # 3. Get frontstore offers
-        frontstore_ids = self._get_frontstore_offers(exclude_ids)
-        if len(frontstore_ids) < self.config.frontstore_per_cycle:
-            errors.append(
-                f"Pool exhaustion: frontstore has {len(frontstore_ids)}, need {self.config.frontstore_per_cycle}"
+        # Another worker is already refreshing this user; don't double-assign
+        if not self.db.execute(TRY_USER_REFRESH_LOCK_SQL, {"uid": user_id}).scalar():
+            logger.info(f"Refresh already in progress for user {user_id}, skipping")
+            return AssignmentResult(
+                user_id=user_id,
+                cycle_id=cycle_id,
+                expired_count=0,
+                frontstore_assigned=0,
+                category_brand_assigned=0,
+                total_assigned=0,
+                errors=[],
+                in_progress=True,
             )
 
-        # 4. Get category/brand offers
-        category_brand_ids = self._get_category_brand_offers(
-            exclude_ids + frontstore_ids
-        )
-        if len(category_brand_ids) < self.config.category_brand_per_cycle:
-            errors.append(
-                f"Pool exhaustion: category/brand has {len(category_brand_ids)}, need {self.config.category_brand_per_cycle}"
-            )
+        # 1-4. Expire ALL active offers, exclude recently assigned coupon IDs
+        # and pick from both pools (one round trip)
+        # Use simulation-aware time for the 28-day threshold
+        # This ensures the exclusion window respects simulation time, not real time
+        threshold = self.time_service.now() - timedelta(days=28)
+        rows = self.db.execute(
+            PICK_WEEKLY_OFFERS_SQL,
+            {
+                "uid": user_id,
+                "threshold": threshold,
+                "frontstore_limit": self.config.frontstore_per_cycle,
+                "category_brand_limit": self.config.category_brand_per_cycle,
+            },
+        ).fetchall()
+
+        expired_count = rows[0].expired_count
+        logger.info(f"Expired all {expired_count} active offers for user {user_id}")
+        frontstore_ids = [r.coupon_id for r in rows if r.pool == "frontstore"]
+        category_brand_ids = [r.coupon_id for r in rows if r.pool == "category_brand"]
 
         # 5. Calculate expiration time and assigned time
         assigned_at = self.time_service.now()
         expiration = self.time_service.get_expiration_time(from_time=assigned_at)
 
-        # 6. Insert new assignments
-        all_coupon_ids = frontstore_ids + category_brand_ids
-        self._insert_assignments(
-            user_id, all_coupon_ids, cycle_id, expiration, assigned_at
+        # 6. Insert new assignments; counts reflect the rows actually written
+        inserted = self._insert_assignments(
+            user_id,
+            frontstore_ids + category_brand_ids,
+            cycle_id,
+            expiration,
+            assigned_at,
         )
+        frontstore_assigned = sum(1 for cid in frontstore_ids if cid in inserted)
+        category_brand_assigned = sum(1 for cid in category_brand_ids if cid in inserted)
+
+        if frontstore_assigned < self.config.frontstore_per_cycle:
+            errors.append(
+                f"Pool exhaustion: frontstore has {frontstore_assigned}, need {self.config.frontstore_per_cycle}"
+            )
+        if category_brand_assigned < self.config.category_brand_per_cycle:
+            errors.append(
+                f"Pool exhaustion: category/brand has {category_brand_assigned}, need {self.config.category_brand_per_cycle}"
+            )
 
         logger.info(
-            f"Assigned {len(all_coupon_ids)} offers to user {user_id} "
-            f"(frontstore: {len(frontstore_ids)}, category/brand: {len(category_brand_ids)})"
+            f"Assigned {len(inserted)} offers to user {user_id} "
+            f"(frontstore: {frontstore_assigned}, category/brand: {category_brand_assigned})"
         )
 
         return AssignmentResult(
             user_id=user_id,
             cycle_id=cycle_id,
             expired_count=expired_count,
-            frontstore_assigned=len(frontstore_ids),
-            category_brand_assigned=len(category_brand_ids),
-            total_assigned=len(all_coupon_ids),
+            frontstore_assigned=frontstore_assigned,
+            category_brand_assigned=category_brand_assigned,
+            total_assigned=len(inserted),
             errors=errors,
         )
 
-    def _get_recent_coupon_ids(self, user_id: str) -> List[str]:
-        """Get coupon IDs assigned in recent cycles (to avoid repetition)."""
-        # Use simulation-aware time for the 28-day threshold
-        # This ensures the exclusion window respects simulation time, not real time
-        threshold = self.time_service.now() - timedelta(days=28)
+    def bulk_assign_weekly_offers(
+        self, user_ids: List[str], cycle_id: str
+    ) -> List[AssignmentResult]:
+        """assign_weekly_offers for many users in two statements.
 
-        result = self.db.execute(
-            text("""
-            SELECT DISTINCT coupon_id
-            FROM user_coupons
-            WHERE user_id = :uid
-              AND is_simulation = true
-              AND assigned_at > :threshold
-        """),
-            {"uid": user_id, "threshold": threshold},
+        Users whose refresh lock is held elsewhere are left out of the
+        results. Left uncommitted, like the single-user path.
+        """
+        if not user_ids:
+            return []
+
+        threshold = self.time_service.now() - timedelta(days=28)
+        rows = self.db.execute(
+            BULK_PICK_WEEKLY_OFFERS_SQL,
+            {
+                "uids": list(user_ids),
+                "threshold": threshold,
+                "frontstore_limit": self.config.frontstore_per_cycle,
+                "category_brand_limit": self.config.category_brand_per_cycle,
+            },
         ).fetchall()
 
-        return [str(row.coupon_id) for row in result]
-
-    def _get_frontstore_offers(self, exclude_ids: List[str]) -> List[str]:
-        """Select random offers from frontstore pool."""
-        if exclude_ids:
-            # Build parameterized NOT IN clause
-            placeholders = ", ".join([f":ex_{i}" for i in range(len(exclude_ids))])
-            params = {f"ex_{i}": eid for i, eid in enumerate(exclude_ids)}
-            params["limit"] = self.config.frontstore_per_cycle
-
-            query = f"""
-                SELECT id FROM coupons
-                WHERE type = 'frontstore'
-                  AND id::text NOT IN ({placeholders})
-                ORDER BY RANDOM()
-                LIMIT :limit
-            """
-        else:
-            query = """
-                SELECT id FROM coupons
-                WHERE type = 'frontstore'
-                ORDER BY RANDOM()
-                LIMIT :limit
-            """
-            params = {"limit": self.config.frontstore_per_cycle}
-
-        result = self.db.execute(text(query), params).fetchall()
-        logger.debug(
-            f"Found {len(result)} frontstore offers (excluding {len(exclude_ids)} IDs)"
-        )
-        return [str(row.id) for row in result]
-
-    def _get_category_brand_offers(self, exclude_ids: List[str]) -> List[str]:
-        """Select random offers from category/brand pool."""
-        if exclude_ids:
-            # Build parameterized NOT IN clause
-            placeholders = ", ".join([f":ex_{i}" for i in range(len(exclude_ids))])
-            params = {f"ex_{i}": eid for i, eid in enumerate(exclude_ids)}
-            params["limit"] = self.config.category_brand_per_cycle
-
-            query = f"""
-                SELECT id FROM coupons
-                WHERE type IN ('category', 'brand')
-                  AND id::text NOT IN ({placeholders})
-                ORDER BY RANDOM()
-                LIMIT :limit
-            """
-        else:
-            query = """
-                SELECT id FROM coupons
-                WHERE type IN ('category', 'brand')
-                ORDER BY RANDOM()
-                LIMIT :limit
-            """
-            params = {"limit": self.config.category_brand_per_cycle}
-
-        result = self.db.execute(text(query), params).fetchall()
-        logger.debug(
-            f"Found {len(result)} category/brand offers (excluding {len(exclude_ids)} IDs)"
+        expired: Dict[str, int] = {}
+        picks: Dict[str, Dict[str, List[str]]] = {}
+        for row in rows:
+            expired[row.user_id] = row.expired_count
+            pools = picks.setdefault(row.user_id, {"frontstore": [], "category_brand": []})
+            if row.coupon_id is not None:
+                pools[row.pool].append(row.coupon_id)
+
+        assigned_at = self.time_service.now()
+        expiration = self.time_service.get_expiration_time(from_time=assigned_at)
+
+        # Parallel (user, coupon) arrays for one unnest INSERT
+        pair_users: List[str] = []
+        pair_coupons: List[str] = []
+        for user_id, pools in picks.items():
+            for ids in pools.values():
+                pair_users.extend([user_id] * len(ids))
+                pair_coupons.extend(ids)
+        inserted: Set[Tuple[str, str]] = set()
+        if pair_coupons:
+            result = self.db.execute(
+                BULK_INSERT_ASSIGNMENTS_SQL,
+                {
+                    "uids": pair_users,
+                    "cids": pair_coupons,
+                    "cycle": cycle_id,
+                    "exp": expiration,
+                    "assigned_at": assigned_at,
+                },
+            )
+            inserted = {(row[0], row[1]) for row in result}
+            skipped = len(pair_coupons) - len(inserted)
+            if skipped > 0:
+                logger.warning(f"Skipped {skipped} coupon(s) already assigned")
+
+        results = []
+        for user_id, pools in picks.items():
+            errors = []
+            # Counts reflect the rows actually written
+            frontstore = sum(
+                1 for cid in pools["frontstore"] if (user_id, cid) in inserted
+            )
+            category_brand = sum(
+                1 for cid in pools["category_brand"] if (user_id, cid) in inserted
+            )
+            if frontstore < self.config.frontstore_per_cycle:
+                errors.append(
+                    f"Pool exhaustion: frontstore has {frontstore}, need {self.config.frontstore_per_cycle}"
+                )
+            if category_brand < self.config.category_brand_per_cycle:
+                errors.append(
+                    f"Pool exhaustion: category/brand has {category_brand}, need {self.config.category_brand_per_cycle}"
+                )
+            results.append(
+                AssignmentResult(
+                    user_id=user_id,
+                    cycle_id=cycle_id,
+                    expired_count=expired[user_id],
+                    frontstore_assigned=frontstore,
+                    category_brand_assigned=category_brand,
+                    total_assigned=frontstore + category_brand,
+                    errors=errors,
+                )
+            )
+
+        logger.info(
+            f"Assigned {len(inserted)} offers to {len(results)} users "
+            f"({len(user_ids) - len(results)} already refreshing)"
         )
-        return [str(row.id) for row in result]
+        return results
 
     def _insert_assignments(
         self,
@@ -184,42 +377,31 @@ class OfferAssigner:
         cycle_id: str,
         expiration,
         assigned_at,
-    ) -> None:
-        """Insert new coupon assignments."""
-        for coupon_id in coupon_ids:
-            try:
-                self.db.execute(text("SAVEPOINT assign_coupon"))
-
-                # Delete any existing simulation record for this user/coupon
-                # This allows re-assignment after the 28-day exclusion window
-                self.db.execute(
-                    text("""
-                    DELETE FROM user_coupons
-                    WHERE user_id = :uid AND coupon_id = :cid AND is_simulation = true
-                """),
-                    {"uid": user_id, "cid": coupon_id},
-                )
+    ) -> Set[str]:
+        """Insert new coupon assignments in one INSERT over the id array.
 
-                self.db.execute(
-                    text("""
-                    INSERT INTO user_coupons
-                        (user_id, coupon_id, status, offer_cycle_id, is_simulation, eligible_until, assigned_at)
-                    VALUES
-                        (:uid, :cid, 'active', :cycle, true, :exp, :assigned_at)
-                """),
-                    {
-                        "uid": user_id,
-                        "cid": coupon_id,
-                        "cycle": cycle_id,
-                        "exp": expiration,
-                        "assigned_at": assigned_at,
-                    },
-                )
-                self.db.execute(text("RELEASE SAVEPOINT assign_coupon"))
-            except Exception as e:
-                self.db.execute(text("ROLLBACK TO SAVEPOINT assign_coupon"))
-                logger.error(
-                    f"Failed to assign coupon {coupon_id} to user {user_id}: {e}"
-                )
+        Returns the coupon ids actually inserted. Left uncommitted: the
+        caller commits the whole refresh at once.
+        """
+        if not coupon_ids:
+            return set()
 
-        self.db.commit()
+        # Coupons the user already holds (outside the simulation, or still
+        # active from an earlier cycle) are skipped
+        result = self.db.execute(
+            INSERT_ASSIGNMENTS_SQL,
+            {
+                "uid": user_id,
+                "cids": list(coupon_ids),
+                "cycle": cycle_id,
+                "exp": expiration,
+                "assigned_at": assigned_at,
+            },
+        )
+        inserted = set(result.scalars())
+        skipped = len(coupon_ids) - len(inserted)
+        if skipped > 0:
+            logger.warning(
+                f"Skipped {skipped} coupon(s) already assigned to user {user_id}"
+            )
+        return inserted
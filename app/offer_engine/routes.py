@@ -8,18 +8,63 @@ import logging
 from datetime import date
 from typing import Optional
 
+import orjson
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
-from . import get_config, get_time_service, get_scheduler, is_simulation_mode
+from app import pg_pool
+from app.responses import ORJSONResponse
+
+from . import (
+    OfferScheduler,
+    TimeService,
+    get_config,
+    get_time_service,
+    get_scheduler,
+    invalidate_cycle_cache,
+    is_simulation_mode,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api", tags=["offer-engine"])
 
 
+# ============================================
+# Dependencies (imported from main)
+# ============================================
+
+_db_dependency = None
+
+
+def set_dependencies(db_dependency):
+    """Set the actual dependencies from main module."""
+    global _db_dependency
+    _db_dependency = db_dependency
+
+
+def db_dep():
+    """DB dependency wrapper that defers to the injected dependency at runtime."""
+    if _db_dependency is None:
+        raise RuntimeError("DB dependency not configured. Did you call set_dependencies()?")
+    # _db_dependency is expected to be a generator dependency that yields a Session
+    yield from _db_dependency()
+
+
+# Each is cached per request; the views share the singletons' simulation
+# state but hold the request's own session
+def time_service_dep(db: Session = Depends(db_dep)) -> TimeService:
+    """Time service view bound to the request's session."""
+    return get_time_service(db)
+
+
+def scheduler_dep(db: Session = Depends(db_dep)) -> OfferScheduler:
+    """Offer scheduler view bound to the request's session."""
+    return get_scheduler(db)
+
+
 # ============================================
 # Request/Response Models
 # ============================================
@@ -41,8 +86,15 @@ class RefreshRequest(BaseModel):
 # Simulation Control Endpoints (S-1)
 # ============================================
 
+# Handlers that run scheduler / time-service work on the sync Session are
+# plain def, so FastAPI runs them in its threadpool instead of on the event
+# loop; only the pg_pool.fetch endpoints are async.
+
 @router.post("/simulation/start")
-async def start_simulation(request: StartSimulationRequest, db: Session = Depends(lambda: None)):
+def start_simulation(
+    request: StartSimulationRequest,
+    time_service: TimeService = Depends(time_service_dep),
+):
     """Start simulation with calendar alignment."""
     config = get_config()
     if not config.simulation_mode:
@@ -57,7 +109,6 @@ async def start_simulation(request: StartSimulationRequest, db: Session = Depend
     if request.time_scale:
         config.time_scale = request.time_scale
 
-    time_service = get_time_service(db)
     time_service.start_simulation(calendar_start)
 
     return {
@@ -69,13 +120,12 @@ async def start_simulation(request: StartSimulationRequest, db: Session = Depend
 
 
 @router.post("/simulation/stop")
-async def stop_simulation(db: Session = Depends(lambda: None)):
+def stop_simulation(time_service: TimeService = Depends(time_service_dep)):
     """End active simulation, preserve state."""
     config = get_config()
     if not config.simulation_mode:
         raise HTTPException(400, "Simulation mode not enabled")
 
-    time_service = get_time_service(db)
     if not time_service.is_simulation_active():
         raise HTTPException(400, "No active simulation to stop")
 
@@ -89,7 +139,10 @@ async def stop_simulation(db: Session = Depends(lambda: None)):
 
 
 @router.post("/simulation/advance")
-async def advance_time(request: AdvanceTimeRequest, db: Session = Depends(lambda: None)):
+def advance_time(
+    request: AdvanceTimeRequest,
+    scheduler: OfferScheduler = Depends(scheduler_dep),
+):
     """Advance simulation time by specified hours."""
     config = get_config()
     if not config.simulation_mode:
@@ -98,8 +151,6 @@ async def advance_time(request: AdvanceTimeRequest, db: Session = Depends(lambda
     if request.hours <= 0:
         raise HTTPException(400, "Hours must be positive")
 
-    scheduler = get_scheduler(db)
-
     try:
         result = scheduler.advance_simulation_time(request.hours)
     except ValueError as e:
@@ -117,17 +168,18 @@ async def advance_time(request: AdvanceTimeRequest, db: Session = Depends(lambda
 
 
 @router.get("/simulation/status")
-async def get_simulation_status(db: Session = Depends(lambda: None)):
+def get_simulation_status(
+    time_service: TimeService = Depends(time_service_dep),
+    scheduler: OfferScheduler = Depends(scheduler_dep),
+):
     """Get current simulation state."""
     config = get_config()
-    time_service = get_time_service(db)
 
     status = time_service.get_status()
     status["simulation_mode_enabled"] = config.simulation_mode
 
     # Add cycle info
     if config.simulation_mode and time_service.is_simulation_active():
-        scheduler = get_scheduler(db)
         cycle = scheduler.cycle_manager.get_or_create_current_cycle()
         status["current_cycle"] = {
             "id": cycle.id,
@@ -142,20 +194,20 @@ async def get_simulation_status(db: Session = Depends(lambda: None)):
 
 
 @router.post("/simulation/reset")
-async def reset_simulation(db: Session = Depends(lambda: None)):
+def reset_simulation(
+    db: Session = Depends(db_dep),
+    time_service: TimeService = Depends(time_service_dep),
+):
     """Reset simulation to fresh state."""
     config = get_config()
     if not config.simulation_mode:
         raise HTTPException(400, "Simulation mode not enabled")
 
-    time_service = get_time_service(db)
-
     # Stop simulation if active
     if time_service.is_simulation_active():
         time_service.stop_simulation()
 
     # Clear simulation data
-    from . import get_scheduler
     db_session = db
 
     # Expire all simulation offers
@@ -178,6 +230,7 @@ async def reset_simulation(db: Session = Depends(lambda: None)):
     """))
 
     db_session.commit()
+    invalidate_cycle_cache()
 
     return {
         "success": True,
@@ -190,63 +243,70 @@ async def reset_simulation(db: Session = Depends(lambda: None)):
 # Offer Endpoints (B-7)
 # ============================================
 
+# Timestamps serialize as ISO 8601, matching datetime.isoformat().
+# Run through pg_pool.fetch, so JSON comes back as text on either driver.
+WALLET_SQL = """
+    SELECT
+        COALESCE(
+            json_agg(
+                json_build_object(
+                    'id', uc.id::text,
+                    'coupon_id', uc.coupon_id::text,
+                    'type', c.type,
+                    'discount_details', c.discount_details,
+                    'category_or_brand', c.category_or_brand,
+                    'status', uc.status,
+                    'assigned_at', uc.assigned_at,
+                    'eligible_until', uc.eligible_until
+                )
+                ORDER BY uc.status, uc.assigned_at DESC
+            ),
+            '[]'
+        )::text AS offers,
+        COUNT(*) FILTER (WHERE uc.status = 'active') AS active_count,
+        COUNT(*) FILTER (WHERE uc.status = 'expired') AS expired_count
+    FROM user_coupons uc
+    JOIN coupons c ON c.id = uc.coupon_id
+    WHERE uc.user_id = :uid AND uc.is_simulation = true
+"""
+
+
 @router.get("/offers/wallet/{user_id}")
-async def get_wallet(user_id: str, db: Session = Depends(lambda: None)):
+async def get_wallet(
+    user_id: str,
+    db: Session = Depends(db_dep),
+    time_service: TimeService = Depends(time_service_dep),
+):
     """Get user's current wallet with status filtering."""
     config = get_config()
     if not config.simulation_mode:
         raise HTTPException(400, "Simulation mode not enabled")
 
-    time_service = get_time_service(db)
-
-    # Get offers
-    result = db.execute(text("""
-        SELECT uc.id, uc.coupon_id, uc.status, uc.assigned_at, uc.eligible_until,
-               c.type, c.discount_details, c.category_or_brand
-        FROM user_coupons uc
-        JOIN coupons c ON c.id = uc.coupon_id
-        WHERE uc.user_id = :uid AND uc.is_simulation = true
-        ORDER BY uc.status, uc.assigned_at DESC
-    """), {"uid": user_id}).fetchall()
-
-    offers = []
-    active_count = 0
-    expired_count = 0
-
-    for row in result:
-        offer = {
-            "id": str(row.id),
-            "coupon_id": str(row.coupon_id),
-            "type": row.type,
-            "discount_details": row.discount_details,
-            "category_or_brand": row.category_or_brand,
-            "status": row.status,
-            "assigned_at": row.assigned_at.isoformat() if row.assigned_at else None,
-            "eligible_until": row.eligible_until.isoformat() if row.eligible_until else None,
-        }
-        offers.append(offer)
-        if row.status == "active":
-            active_count += 1
-        elif row.status == "expired":
-            expired_count += 1
+    # Offers as JSON plus status counts, built by Postgres in one row
+    offers, active_count, expired_count = (
+        await pg_pool.fetch(db, WALLET_SQL, {"uid": user_id})
+    )[0]
+    simulated_date = time_service.get_simulated_date()
 
-    return {
+    return ORJSONResponse({
         "user_id": user_id,
-        "simulated_date": time_service.get_simulated_date().isoformat() if time_service.get_simulated_date() else None,
-        "offers": offers,
+        "simulated_date": simulated_date.isoformat() if simulated_date else None,
+        "offers": orjson.Fragment(offers),
         "active_count": active_count,
         "expired_count": expired_count,
-    }
+    })
 
 
 @router.post("/offers/refresh")
-async def force_refresh(request: RefreshRequest, db: Session = Depends(lambda: None)):
+def force_refresh(
+    request: RefreshRequest,
+    scheduler: OfferScheduler = Depends(scheduler_dep),
+):
     """Force refresh for user (simulation only)."""
     config = get_config()
     if not config.simulation_mode:
         raise HTTPException(400, "Simulation mode not enabled")
 
-    scheduler = get_scheduler(db)
     result = scheduler.force_refresh_user(request.user_id)
 
     if not result.refreshed:
@@ -261,13 +321,15 @@ async def force_refresh(request: RefreshRequest, db: Session = Depends(lambda: N
 
 
 @router.get("/offers/stats/{user_id}")
-async def get_offer_stats(user_id: str, db: Session = Depends(lambda: None)):
+def get_offer_stats(
+    user_id: str,
+    scheduler: OfferScheduler = Depends(scheduler_dep),
+):
     """Get offer statistics for a user."""
     config = get_config()
     if not config.simulation_mode:
         raise HTTPException(400, "Simulation mode not enabled")
 
-    scheduler = get_scheduler(db)
     stats = scheduler.expiration_handler.get_expiration_stats(user_id)
 
     # Get cycle info
@@ -281,8 +343,56 @@ async def get_offer_stats(user_id: str, db: Session = Depends(lambda: None)):
     }
 
 
+SIMULATION_STATS_SQL = """
+    SELECT json_build_object(
+        'agents_active', (SELECT COUNT(*) FROM agents WHERE is_active = true),
+        'sessions', (
+            SELECT json_build_object(
+                'total', COUNT(*),
+                'completed', COUNT(*) FILTER (WHERE status = 'completed'),
+                'abandoned', COUNT(*) FILTER (WHERE status = 'abandoned'),
+                'active', COUNT(*) FILTER (WHERE status = 'active')
+            )
+            FROM shopping_sessions
+            WHERE is_simulated = true
+        ),
+        'orders', (
+            SELECT json_build_object(
+                'total', COUNT(*),
+                'revenue', COALESCE(SUM(total), 0)
+            )
+            FROM orders
+            WHERE is_simulated = true
+        ),
+        'events', (
+            SELECT COALESCE(json_object_agg(event_type, n), '{}')
+            FROM (
+                SELECT ev.event_type, COUNT(*) AS n
+                FROM shopping_session_events ev
+                JOIN shopping_sessions s
+                  ON s.id = ev.session_id AND s.is_simulated = true
+                GROUP BY ev.event_type
+            ) e
+        ),
+        'offers', (
+            SELECT COALESCE(json_object_agg(status, n), '{}')
+            FROM (
+                SELECT COALESCE(status, 'unknown') AS status, COUNT(*) AS n
+                FROM user_coupons
+                WHERE is_simulation = true
+                GROUP BY 1
+            ) o
+        ),
+        'cycles_completed', (SELECT COUNT(*) FROM offer_cycles WHERE is_simulation = true)
+    )::text
+"""
+
+
 @router.get("/simulation/stats")
-async def get_simulation_stats(db: Session = Depends(lambda: None)):
+async def get_simulation_stats(
+    db: Session = Depends(db_dep),
+    time_service: TimeService = Depends(time_service_dep),
+):
     """
     Get comprehensive simulation statistics from database.
 
@@ -295,81 +405,22 @@ async def get_simulation_stats(db: Session = Depends(lambda: None)):
     stats = {}
 
     # Simulation state
-    time_service = get_time_service(db)
     status = time_service.get_status()
     stats["simulated_date"] = str(status.get("current_simulated_date")) if status.get("current_simulated_date") else None
     stats["is_active"] = status.get("is_active", False)
     stats["time_scale"] = status.get("time_scale")
 
-    # Agent counts
-    result = db.execute(text("""
-        SELECT COUNT(*) FROM agents WHERE is_active = true
-    """))
-    stats["agents_active"] = result.scalar() or 0
-
-    # Session counts
-    result = db.execute(text("""
-        SELECT
-            COUNT(*) as total,
-            COUNT(*) FILTER (WHERE status = 'completed') as completed,
-            COUNT(*) FILTER (WHERE status = 'abandoned') as abandoned,
-            COUNT(*) FILTER (WHERE status = 'active') as active
-        FROM shopping_sessions
-        WHERE is_simulated = true
-    """))
-    row = result.fetchone()
-    stats["sessions"] = {
-        "total": row[0] or 0,
-        "completed": row[1] or 0,
-        "abandoned": row[2] or 0,
-        "active": row[3] or 0
-    } if row else {"total": 0, "completed": 0, "abandoned": 0, "active": 0}
-
-    # Order counts
-    result = db.execute(text("""
-        SELECT
-            COUNT(*) as total,
-            COALESCE(SUM(total), 0) as revenue
-        FROM orders
-        WHERE is_simulated = true
-    """))
-    row = result.fetchone()
+    # Agent, session, order, event, offer and cycle counts in one round trip
+    counts = orjson.loads((await pg_pool.fetch(db, SIMULATION_STATS_SQL, {}))[0][0])
+    stats["agents_active"] = counts["agents_active"]
+    stats["sessions"] = counts["sessions"]
     stats["orders"] = {
-        "total": row[0] or 0,
-        "revenue": float(row[1] or 0)
-    } if row else {"total": 0, "revenue": 0.0}
-
-    # Event counts by type
-    result = db.execute(text("""
-        SELECT event_type, COUNT(*)
-        FROM shopping_session_events
-        WHERE session_id IN (
-            SELECT id FROM shopping_sessions WHERE is_simulated = true
-        )
-        GROUP BY event_type
-    """))
-    event_counts = {}
-    for row in result.fetchall():
-        event_counts[row[0]] = row[1]
-    stats["events"] = event_counts
-    stats["events"]["total"] = sum(event_counts.values())
-
-    # Offer counts by status
-    result = db.execute(text("""
-        SELECT status, COUNT(*)
-        FROM user_coupons
-        WHERE is_simulation = true
-        GROUP BY status
-    """))
-    offer_counts = {}
-    for row in result.fetchall():
-        offer_counts[row[0] or 'unknown'] = row[1]
-    stats["offers"] = offer_counts
-
-    # Cycle count
-    result = db.execute(text("""
-        SELECT COUNT(*) FROM offer_cycles WHERE is_simulation = true
-    """))
-    stats["cycles_completed"] = result.scalar() or 0
+        "total": counts["orders"]["total"],
+        "revenue": float(counts["orders"]["revenue"]),
+    }
+    stats["events"] = counts["events"]
+    stats["events"]["total"] = sum(counts["events"].values())
+    stats["offers"] = counts["offers"]
+    stats["cycles_completed"] = counts["cycles_completed"]
 
     return stats
@@ -7,9 +7,9 @@ Orchestrates offer refresh operations.
 import logging
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Callable, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Set
 
-from sqlalchemy import text
+from sqlalchemy import TextClause, text
 from sqlalchemy.orm import Session
 
 from .config import OfferEngineConfig
@@ -20,6 +20,49 @@ from .offer_assigner import OfferAssigner
 
 logger = logging.getLogger(__name__)
 
+# Rows fetched per round trip when streaming agent/user id lists
+ID_STREAM_BATCH_SIZE = 1000
+
+# Users refreshed per bulk transaction when advancing time
+REFRESH_BATCH_SIZE = 500
+
+# Agent filter shared by the user-discovery queries; a NULL :agent_ids
+# matches every agent, so the statement text never depends on the list
+_AGENT_FILTER = """
+    AND (
+        CAST(:agent_ids AS text[]) IS NULL
+        OR a.agent_id = ANY(CAST(:agent_ids AS text[]))
+    )
+"""
+
+# Past-due enrolled users plus active agents never enrolled
+USERS_NEEDING_REFRESH_SQL = text("""
+    SELECT DISTINCT u.id::text AS id, uoc.user_id IS NULL AS is_new
+    FROM users u
+    JOIN agents a ON a.user_id = u.id
+    LEFT JOIN user_offer_cycles uoc
+      ON uoc.user_id = u.id AND uoc.is_simulation = true
+    WHERE (
+        (uoc.user_id IS NOT NULL AND uoc.next_refresh_at <= :now)
+        OR (uoc.user_id IS NULL AND a.is_active = true)
+    )
+""" + _AGENT_FILTER)
+
+ACTIVE_AGENT_USERS_SQL = text("""
+    SELECT DISTINCT u.id::text
+    FROM users u
+    JOIN agents a ON a.user_id = u.id
+    WHERE a.is_active = true
+""" + _AGENT_FILTER)
+
+ENROLLED_AGENT_USERS_SQL = text("""
+    SELECT DISTINCT u.id::text
+    FROM user_offer_cycles uoc
+    JOIN users u ON u.id = uoc.user_id
+    JOIN agents a ON a.user_id = u.id
+    WHERE uoc.is_simulation = true
+""" + _AGENT_FILTER)
+
 
 @dataclass
 class RefreshResult:
@@ -61,6 +104,10 @@ class OfferScheduler:
             config, time_service, self.expiration_handler, db
         )
 
+    def for_session(self, db: Session) -> "OfferScheduler":
+        """A scheduler over the same simulation clock that uses db."""
+        return OfferScheduler(self.config, self.time_service.for_session(db), db)
+
     def check_and_refresh_user(self, user_id: str) -> RefreshResult:
         """Main entry point: check if refresh needed, perform if so."""
         if not self.config.simulation_mode:
@@ -96,8 +143,14 @@ class OfferScheduler:
 
             # Assign offers
             result = self.offer_assigner.assign_weekly_offers(user_id, cycle.id)
+            if result.in_progress:
+                self.db.rollback()
+                return RefreshResult(
+                    user_id=user_id, refreshed=False, reason="in_progress"
+                )
 
-            # Update user's refresh time
+            # Update user's refresh time; this commits the assignments too,
+            # so the refresh (and its advisory lock) is one transaction
             self.cycle_manager.update_user_refresh_time(user_id, cycle.id)
 
             return RefreshResult(
@@ -114,6 +167,42 @@ class OfferScheduler:
                 user_id=user_id, refreshed=False, reason=f"error: {str(e)}"
             )
 
+    def _perform_bulk_refresh(
+        self, user_ids: List[str], cycle_id: str
+    ) -> List[RefreshResult]:
+        """Refresh a batch of users in one transaction.
+
+        Falls back to refreshing one user at a time if the batch fails, so a
+        single bad user does not block the rest.
+        """
+        try:
+            assignments = self.offer_assigner.bulk_assign_weekly_offers(
+                user_ids, cycle_id
+            )
+            refreshed_ids = [a.user_id for a in assignments]
+            self.cycle_manager.update_user_refresh_times(refreshed_ids, cycle_id)
+        except Exception as e:
+            self.db.rollback()
+            logger.warning(f"Bulk refresh of {len(user_ids)} users failed, retrying one by one: {e}")
+            return [self._perform_refresh(user_id) for user_id in user_ids]
+
+        results = [
+            RefreshResult(
+                user_id=a.user_id,
+                refreshed=True,
+                reason="success",
+                assigned_count=a.total_assigned,
+                expired_count=a.expired_count,
+            )
+            for a in assignments
+        ]
+        skipped = set(user_ids) - set(refreshed_ids)
+        results.extend(
+            RefreshResult(user_id=user_id, refreshed=False, reason="in_progress")
+            for user_id in skipped
+        )
+        return results
+
     def _should_skip_cooldown(self, user_id: str) -> bool:
         """Check if user was refreshed within cooldown period."""
         state = self.cycle_manager.get_user_cycle_state(user_id)
@@ -148,34 +237,43 @@ class OfferScheduler:
         # Advance time
         time_result = self.time_service.advance_time(hours)
 
-        # Check for cycle transitions and create new cycles if needed
-        cycles_completed = 0
-        current_cycle = self.cycle_manager.get_or_create_current_cycle()
-        while self.time_service.now() > current_cycle.ends_at:
-            current_cycle = self.cycle_manager.create_new_cycle()
-            cycles_completed += 1
-
-        # Get all simulation users needing refresh
-        users = self._get_users_needing_refresh(
-            agent_ids=agent_ids, process_all=process_all_agents
-        )
-        logger.info(f"Found {len(users)} users needing refresh")
-
-        # Refresh each user
-        refreshed_count = 0
-        total_offers_assigned = 0
-        for user_id in users:
-            result = self._perform_refresh(user_id)
-            if result.refreshed:
-                refreshed_count += 1
-                total_offers_assigned += result.assigned_count
-                logger.info(
-                    f"  Refreshed user {user_id[:8]}...: {result.assigned_count} offers assigned"
-                )
-            else:
-                logger.warning(
-                    f"  Failed to refresh user {user_id[:8]}...: {result.reason}"
-                )
+        # One pinned timestamp for cycle checks and every refresh in this advance
+        with self.time_service.frozen():
+            # Check for cycle transitions and create new cycles if needed
+            cycles_completed = 0
+            current_cycle = self.cycle_manager.get_or_create_current_cycle()
+            while self.time_service.now() > current_cycle.ends_at:
+                current_cycle = self.cycle_manager.create_new_cycle()
+                cycles_completed += 1
+
+            # Get all simulation users needing refresh
+            users = self._get_users_needing_refresh(
+                agent_ids=agent_ids, process_all=process_all_agents
+            )
+            logger.info(f"Found {len(users)} users needing refresh")
+
+            # Refresh users in bulk batches
+            refreshed_count = 0
+            total_offers_assigned = 0
+            results = []
+            for start in range(0, len(users), REFRESH_BATCH_SIZE):
+                batch = users[start : start + REFRESH_BATCH_SIZE]
+                results.extend(self._perform_bulk_refresh(batch, current_cycle.id))
+            # Per-user lines only at debug level; the summary below covers info
+            log_each = logger.isEnabledFor(logging.DEBUG)
+            for result in results:
+                user_id = result.user_id
+                if result.refreshed:
+                    refreshed_count += 1
+                    total_offers_assigned += result.assigned_count
+                    if log_each:
+                        logger.debug(
+                            f"  Refreshed user {user_id[:8]}...: {result.assigned_count} offers assigned"
+                        )
+                else:
+                    logger.warning(
+                        f"  Failed to refresh user {user_id[:8]}...: {result.reason}"
+                    )
 
         logger.info(
             f"Advanced {hours}h: {cycles_completed} cycles, {refreshed_count} users refreshed, {total_offers_assigned} offers assigned"
@@ -192,6 +290,21 @@ class OfferScheduler:
             real_hours_advanced=hours,
         )
 
+    def _stream_ids(
+        self, query: TextClause, params: Optional[Dict[str, Any]] = None
+    ) -> Set[str]:
+        """Collect a single-column id query into a set, streaming rows in batches.
+
+        These queries grow with the agent population; yield_per uses a
+        server-side cursor so the full Row list is never materialized.
+        Queries select ids as ::text, so no per-row UUID conversion is needed.
+        """
+        result = self.db.execute(
+            query.execution_options(yield_per=ID_STREAM_BATCH_SIZE),
+            params or {},
+        )
+        return set(result.scalars())
+
     def _get_users_needing_refresh(
         self, agent_ids: Optional[List[str]] = None, process_all: bool = True
     ) -> List[str]:
@@ -210,92 +323,31 @@ class OfferScheduler:
         """
         current_time = self.time_service.now()
 
-        # Build WHERE clause for agent filtering
-        agent_filter = ""
-        agent_params = {}
+        # Agent filtering (None means all agents)
+        agent_filter = None
         if not process_all and agent_ids:
-            placeholders = ", ".join([f":aid_{i}" for i in range(len(agent_ids))])
-            agent_filter = f"AND a.agent_id IN ({placeholders})"
-            agent_params = {f"aid_{i}": aid for i, aid in enumerate(agent_ids)}
+            agent_filter = list(agent_ids)
             logger.info(f"Filtering to {len(agent_ids)} specific agents: {agent_ids}")
 
-        # Get users past their refresh time
-        existing_users_query = f"""
-            SELECT DISTINCT u.id
-            FROM user_offer_cycles uoc
-            JOIN users u ON u.id = uoc.user_id
-            JOIN agents a ON a.user_id = u.id
-            WHERE uoc.is_simulation = true
-              AND uoc.next_refresh_at <= :now
-              {agent_filter}
-        """
-        existing_users = self.db.execute(
-            text(existing_users_query),
-            {"now": current_time, **agent_params},
-        ).fetchall()
-
-        logger.debug(f"Existing users past refresh time: {len(existing_users)}")
-
-        existing_ids = {str(row.id) for row in existing_users}
-
-        # Get all agent users who may not be enrolled yet
-        all_agent_users_query = f"""
-            SELECT DISTINCT u.id
-            FROM users u
-            JOIN agents a ON a.user_id = u.id
-            WHERE a.is_active = true
-              {agent_filter}
-        """
-        all_agent_users = self.db.execute(
-            text(all_agent_users_query),
-            agent_params,
-        ).fetchall()
-
-        all_agent_ids = {str(row.id) for row in all_agent_users}
-
-        # Find new users (in agents but not in user_offer_cycles)
-        enrolled_users_query = f"""
-            SELECT DISTINCT u.id
-            FROM user_offer_cycles uoc
-            JOIN users u ON u.id = uoc.user_id
-            JOIN agents a ON a.user_id = u.id
-            WHERE uoc.is_simulation = true
-              {agent_filter}
-        """
-        enrolled_users = self.db.execute(
-            text(enrolled_users_query),
-            agent_params,
-        ).fetchall()
-
-        enrolled_ids = {str(row.id) for row in enrolled_users}
-
-        new_user_ids = all_agent_ids - enrolled_ids
-
-        logger.debug(
-            f"All active agents: {len(all_agent_ids)}, Enrolled agents: {len(enrolled_ids)}, New agents: {len(new_user_ids)}"
+        result = self.db.execute(
+            USERS_NEEDING_REFRESH_SQL.execution_options(yield_per=ID_STREAM_BATCH_SIZE),
+            {"now": current_time, "agent_ids": agent_filter},
         )
-
-        # Combine: users needing refresh + new users needing initial enrollment
-        all_needing_refresh = existing_ids | new_user_ids
+        user_ids = []
+        new_count = 0
+        for row in result:
+            user_ids.append(row.id)
+            new_count += row.is_new
 
         logger.info(
-            f"Users needing refresh: {len(existing_ids)} existing (past due), {len(new_user_ids)} new (never enrolled)"
+            f"Users needing refresh: {len(user_ids) - new_count} existing (past due), {new_count} new (never enrolled)"
         )
 
-        return list(all_needing_refresh)
+        return user_ids
 
     def get_all_simulation_user_ids(self) -> List[str]:
         """Get all users in simulation mode."""
-        result = self.db.execute(
-            text("""
-            SELECT DISTINCT u.id
-            FROM users u
-            JOIN agents a ON a.user_id = u.id
-            WHERE a.is_active = true
-        """)
-        ).fetchall()
-
-        return [str(row.id) for row in result]
+        return list(self._stream_ids(ACTIVE_AGENT_USERS_SQL, {"agent_ids": None}))
 
     def initialize_all_agents(
         self,
@@ -341,27 +393,27 @@ class OfferScheduler:
 
         logger.info(f"Found {len(users)} agents needing initial offer assignment")
 
-        # Assign offers to each agent
-        # Note: Sequential to avoid database session concurrency issues
-        # Future: Could parallelize with thread-local sessions
+        # Assign offers in bulk batches, checking for a stop between batches
         total_offers_assigned = 0
         initialized_count = 0
-
-        for i, user_id in enumerate(users, 1):
-            # Check if we should stop (Ctrl+C pressed)
-            if should_stop_check and should_stop_check():
-                logger.warning(f"  Initialization aborted after {i-1}/{len(users)} agents")
-                break
-
-            result = self._perform_refresh(user_id)
-            if result.refreshed:
-                initialized_count += 1
-                total_offers_assigned += result.assigned_count
-                # Progress logging every 10 agents
-                if i % 10 == 0 or i == len(users):
-                    logger.info(f"  Progress: {i}/{len(users)} agents processed, {initialized_count} initialized")
-            else:
-                logger.warning(f"  Failed to initialize agent {user_id[:8]}...: {result.reason}")
+        processed = 0
+
+        with self.time_service.frozen():
+            for start in range(0, len(users), REFRESH_BATCH_SIZE):
+                # Check if we should stop (Ctrl+C pressed)
+                if should_stop_check and should_stop_check():
+                    logger.warning(f"  Initialization aborted after {processed}/{len(users)} agents")
+                    break
+
+                batch = users[start : start + REFRESH_BATCH_SIZE]
+                for result in self._perform_bulk_refresh(batch, current_cycle.id):
+                    if result.refreshed:
+                        initialized_count += 1
+                        total_offers_assigned += result.assigned_count
+                    else:
+                        logger.warning(f"  Failed to initialize agent {result.user_id[:8]}...: {result.reason}")
+                processed += len(batch)
+                logger.info(f"  Progress: {processed}/{len(users)} agents processed, {initialized_count} initialized")
 
         logger.info("="*60)
         logger.info(f"INITIALIZATION COMPLETE: {initialized_count} agents, {total_offers_assigned} offers assigned")
@@ -393,45 +445,21 @@ class OfferScheduler:
         Returns:
             List of user IDs needing initialization
         """
-        # Build WHERE clause for agent filtering
-        agent_filter = ""
-        agent_params = {}
+        # Agent filtering (None means all agents)
+        agent_filter = None
         if not process_all and agent_ids:
-            placeholders = ", ".join([f":aid_{i}" for i in range(len(agent_ids))])
-            agent_filter = f"AND a.agent_id IN ({placeholders})"
-            agent_params = {f"aid_{i}": aid for i, aid in enumerate(agent_ids)}
+            agent_filter = list(agent_ids)
             logger.info(f"Filtering to {len(agent_ids)} specific agents for initialization")
 
         # Get all active agent users
-        all_agent_users_query = f"""
-            SELECT DISTINCT u.id
-            FROM users u
-            JOIN agents a ON a.user_id = u.id
-            WHERE a.is_active = true
-              {agent_filter}
-        """
-        all_agent_users = self.db.execute(
-            text(all_agent_users_query),
-            agent_params
-        ).fetchall()
-
-        all_agent_ids = {str(row.id) for row in all_agent_users}
+        all_agent_ids = self._stream_ids(
+            ACTIVE_AGENT_USERS_SQL, {"agent_ids": agent_filter}
+        )
 
         # Get agents already enrolled in any cycle
-        enrolled_users_query = f"""
-            SELECT DISTINCT u.id
-            FROM user_offer_cycles uoc
-            JOIN users u ON u.id = uoc.user_id
-            JOIN agents a ON a.user_id = u.id
-            WHERE uoc.is_simulation = true
-              {agent_filter}
-        """
-        enrolled_users = self.db.execute(
-            text(enrolled_users_query),
-            agent_params
-        ).fetchall()
-
-        enrolled_ids = {str(row.id) for row in enrolled_users}
+        enrolled_ids = self._stream_ids(
+            ENROLLED_AGENT_USERS_SQL, {"agent_ids": agent_filter}
+        )
 
         # Find brand new agents (never enrolled)
         new_user_ids = all_agent_ids - enrolled_ids
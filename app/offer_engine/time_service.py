@@ -4,9 +4,13 @@ Time Service - B-2
 Time abstraction layer with calendar alignment for simulation mode.
 """
 
+import copy
 import logging
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime, date, timedelta
-from typing import Optional
+from typing import Iterator, Optional
 from dataclasses import dataclass
 
 from sqlalchemy import text
@@ -16,6 +20,24 @@ from .config import OfferEngineConfig
 
 logger = logging.getLogger(__name__)
 
+LOAD_STATE_SQL = text("""
+    SELECT simulation_start_time, real_start_time,
+           simulation_calendar_start, is_active, time_scale
+    FROM simulation_state WHERE id = 1
+""")
+
+SAVE_STATE_SQL = text("""
+    UPDATE simulation_state SET
+        simulation_start_time = :sim_start,
+        real_start_time = :real_start,
+        simulation_calendar_start = :cal_start,
+        current_simulated_date = :current_date,
+        is_active = :is_active,
+        time_scale = :time_scale,
+        updated_at = NOW()
+    WHERE id = 1
+""")
+
 
 @dataclass
 class SimulatedTimeResult:
@@ -27,60 +49,107 @@ class SimulatedTimeResult:
     simulated_days_advanced: int
 
 
+@dataclass
+class _SimulationClock:
+    """Simulation clock state shared by a TimeService and its session views."""
+
+    simulation_start_time: Optional[datetime] = None
+    real_start_time: Optional[datetime] = None
+    # time.monotonic() reading equivalent to real_start_time, so now()
+    # needs no wall-clock call (kept in sync by _anchor_monotonic)
+    real_start_monotonic: Optional[float] = None
+    calendar_start: Optional[date] = None
+    is_active: bool = False
+
+
 class TimeService:
     """Time abstraction for real vs simulation mode."""
 
     def __init__(self, config: OfferEngineConfig, db: Session = None):
         self.config = config
         self.db = db
-        self._simulation_start_time: Optional[datetime] = None
-        self._real_start_time: Optional[datetime] = None
-        self._calendar_start: Optional[date] = None
-        self._is_active: bool = False
+        self._clock = _SimulationClock()
+        # Per-thread pinned now() (see frozen()); the service is a shared singleton
+        self._frozen = threading.local()
+
+    def for_session(self, db: Session) -> "TimeService":
+        """A view of this service that uses db, sharing the clock and pins.
+
+        Requests each get their own view instead of rebinding the shared
+        service, so concurrent requests never swap each other's session.
+        """
+        view = copy.copy(self)
+        view.db = db
+        return view
+
+    @contextmanager
+    def frozen(self) -> Iterator[datetime]:
+        """Pin now() to a single value for one logical operation.
+
+        Every timestamp written by a bulk refresh then agrees, and now() is
+        not recomputed per call. Re-entrant; advance_time re-pins the value.
+        """
+        pinned = getattr(self._frozen, "now", None)
+        if pinned is not None:
+            yield pinned
+            return
+        self._frozen.now = self._compute_now()
+        try:
+            yield self._frozen.now
+        finally:
+            self._frozen.now = None
 
     def now(self) -> datetime:
         """Returns current time (real or simulated)."""
-        if not self.config.simulation_mode or not self._is_active:
+        pinned = getattr(self._frozen, "now", None)
+        if pinned is not None:
+            return pinned
+        return self._compute_now()
+
+    def _compute_now(self) -> datetime:
+        """Current time from the clock, ignoring any pinned value."""
+        if not self.config.simulation_mode or not self._clock.is_active:
             return datetime.utcnow()
 
         # Calculate elapsed real time
-        real_elapsed = datetime.utcnow() - self._real_start_time
-        real_hours = real_elapsed.total_seconds() / 3600
+        real_hours = (time.monotonic() - self._clock.real_start_monotonic) / 3600
 
         # Scale to simulated hours
         simulated_hours = real_hours * self.config.time_scale
 
-        logger.debug(
-            f"time_service.now() - real_elapsed: {real_hours:.3f}h, "
-            f"time_scale: {self.config.time_scale}, "
-            f"simulated_hours: {simulated_hours:.3f}h"
-        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                f"time_service.now() - real_elapsed: {real_hours:.3f}h, "
+                f"time_scale: {self.config.time_scale}, "
+                f"simulated_hours: {simulated_hours:.3f}h"
+            )
 
         # Return simulated time
-        return self._simulation_start_time + timedelta(hours=simulated_hours)
+        return self._clock.simulation_start_time + timedelta(hours=simulated_hours)
 
     def get_simulated_date(self) -> Optional[date]:
         """Get current simulated calendar date."""
-        if not self._is_active or not self._calendar_start:
+        if not self._clock.is_active or not self._clock.calendar_start:
             return None
 
         # Calculate simulated days from start (including fractional days)
         simulated_now = self.now()
         exact_days = (
-            simulated_now - self._simulation_start_time
+            simulated_now - self._clock.simulation_start_time
         ).total_seconds() / 86400
 
-        return self._calendar_start + timedelta(days=exact_days)
+        return self._clock.calendar_start + timedelta(days=exact_days)
 
     def start_simulation(self, calendar_start: date) -> None:
         """Begin simulation from specified calendar date."""
         logger.info(f"START_SIMULATION called with calendar_start={calendar_start}")
-        self._simulation_start_time = datetime.combine(
+        self._clock.simulation_start_time = datetime.combine(
             calendar_start, datetime.min.time()
         )
-        self._real_start_time = datetime.utcnow()
-        self._calendar_start = calendar_start
-        self._is_active = True
+        self._clock.real_start_time = datetime.utcnow()
+        self._anchor_monotonic()
+        self._clock.calendar_start = calendar_start
+        self._clock.is_active = True
         logger.info(f"Set _is_active=True, _calendar_start={calendar_start}")
         self.save_state()
         logger.info(
@@ -93,27 +162,30 @@ class TimeService:
             "final_simulated_date": self.get_simulated_date(),
             "total_real_hours_elapsed": self._get_real_hours_elapsed(),
         }
-        self._is_active = False
+        self._clock.is_active = False
         self.save_state()
         logger.info(f"Simulation stopped. Final date: {result['final_simulated_date']}")
         return result
 
     def advance_time(self, hours: float) -> SimulatedTimeResult:
         """Advance simulation clock by N real hours."""
-        if not self._is_active:
+        if not self._clock.is_active:
             raise ValueError("Simulation is not active")
 
         previous_date = self.get_simulated_date()
 
         # Move real start time back to simulate time passage
-        self._real_start_time -= timedelta(hours=hours)
+        self._clock.real_start_time -= timedelta(hours=hours)
+        self._clock.real_start_monotonic -= hours * 3600
+        if getattr(self._frozen, "now", None) is not None:
+            self._frozen.now = self._compute_now()
 
         new_date = self.get_simulated_date()
         simulated_days = (
             (new_date - previous_date).days if previous_date and new_date else 0
         )
 
-        self.save_state()
+        self.save_state(new_date)
         logger.info(
             f"advance_time({hours}h) - time_scale: {self.config.time_scale}, "
             f"date: {previous_date} -> {new_date}, "
@@ -150,13 +222,18 @@ class TimeService:
 
     def is_simulation_active(self) -> bool:
         """Check if simulation is currently active."""
-        return self.config.simulation_mode and self._is_active
+        return self.config.simulation_mode and self._clock.is_active
+
+    def _anchor_monotonic(self) -> None:
+        """Derive the monotonic start reading from real_start_time."""
+        elapsed = (datetime.utcnow() - self._clock.real_start_time).total_seconds()
+        self._clock.real_start_monotonic = time.monotonic() - elapsed
 
     def _get_real_hours_elapsed(self) -> float:
         """Get real hours elapsed since simulation start."""
-        if not self._real_start_time:
+        if not self._clock.real_start_time:
             return 0.0
-        elapsed = datetime.utcnow() - self._real_start_time
+        elapsed = datetime.utcnow() - self._clock.real_start_time
         return elapsed.total_seconds() / 3600
 
     def load_state(self) -> None:
@@ -165,50 +242,41 @@ class TimeService:
             return
 
         try:
-            result = self.db.execute(
-                text("""
-                SELECT simulation_start_time, real_start_time,
-                       simulation_calendar_start, is_active, time_scale
-                FROM simulation_state WHERE id = 1
-            """)
-            ).fetchone()
+            result = self.db.execute(LOAD_STATE_SQL).fetchone()
 
             if result and result.is_active:
-                self._simulation_start_time = result.simulation_start_time
-                self._real_start_time = result.real_start_time
-                self._calendar_start = result.simulation_calendar_start
-                self._is_active = result.is_active
+                self._clock.simulation_start_time = result.simulation_start_time
+                self._clock.real_start_time = result.real_start_time
+                self._anchor_monotonic()
+                self._clock.calendar_start = result.simulation_calendar_start
+                self._clock.is_active = result.is_active
                 self.config.time_scale = float(result.time_scale)
                 logger.info(
-                    f"Loaded simulation state: active={self._is_active}, date={self._calendar_start}"
+                    f"Loaded simulation state: active={self._clock.is_active}, date={self._clock.calendar_start}"
                 )
         except Exception as e:
             logger.error(f"Failed to load simulation state: {e}")
 
-    def save_state(self) -> None:
-        """Persist simulation state to database."""
+    def save_state(self, current_date: Optional[date] = None) -> None:
+        """Persist simulation state to database.
+
+        Args:
+            current_date: Simulated date if the caller already computed it
+        """
         if not self.db:
             return
+        if current_date is None:
+            current_date = self.get_simulated_date()
 
         try:
             self.db.execute(
-                text("""
-                UPDATE simulation_state SET
-                    simulation_start_time = :sim_start,
-                    real_start_time = :real_start,
-                    simulation_calendar_start = :cal_start,
-                    current_simulated_date = :current_date,
-                    is_active = :is_active,
-                    time_scale = :time_scale,
-                    updated_at = NOW()
-                WHERE id = 1
-            """),
+                SAVE_STATE_SQL,
                 {
-                    "sim_start": self._simulation_start_time,
-                    "real_start": self._real_start_time,
-                    "cal_start": self._calendar_start,
-                    "current_date": self.get_simulated_date(),
-                    "is_active": self._is_active,
+                    "sim_start": self._clock.simulation_start_time,
+                    "real_start": self._clock.real_start_time,
+                    "cal_start": self._clock.calendar_start,
+                    "current_date": current_date,
+                    "is_active": self._clock.is_active,
                     "time_scale": self.config.time_scale,
                 },
             )
@@ -219,14 +287,15 @@ class TimeService:
 
     def get_status(self) -> dict:
         """Get current simulation status."""
+        simulated_date = self.get_simulated_date()
         return {
-            "is_active": self._is_active,
+            "is_active": self._clock.is_active,
             "simulation_mode": self.config.simulation_mode,
-            "calendar_start": self._calendar_start.isoformat()
-            if self._calendar_start
+            "calendar_start": self._clock.calendar_start.isoformat()
+            if self._clock.calendar_start
             else None,
-            "current_simulated_date": self.get_simulated_date().isoformat()
-            if self.get_simulated_date()
+            "current_simulated_date": simulated_date.isoformat()
+            if simulated_date
             else None,
             "real_elapsed_hours": round(self._get_real_hours_elapsed(), 2),
             "time_scale": self.config.time_scale,
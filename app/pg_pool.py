@@ -0,0 +1,201 @@
+"""
+asyncpg-backed database access for async request handlers.
+
+The synchronous SQLAlchemy session blocks the event loop for every query
+when used from `async def` handlers. This module offers two non-blocking
+alternatives on the same database, sharing one connection pool:
+
+- `fetch`: runs `:name`-style SQL directly on a pooled asyncpg connection
+  and returns asyncpg Records (indexable like Rows). Used for the hottest
+  read paths; falls back to the sync session when asyncpg is unavailable.
+- `get_async_db`: FastAPI dependency yielding a SQLAlchemy `AsyncSession`
+  (asyncpg driver) for handlers migrated off the sync session.
+
+Connection budget per worker: PG_POOL_MAX_SIZE + PG_POOL_MAX_OVERFLOW async
+connections (20 + 10 by default) on top of the sync engine's
+SIMULATION_POOL_SIZE + SIMULATION_MAX_OVERFLOW; multiply by the gunicorn
+worker count (2, see Procfile) for the total against the database.
+
+Usage:
+    rows = await pg_pool.fetch(db, "SELECT ... WHERE user_id = :uid", {"uid": user_id})
+
+    async def handler(db: AsyncSession = Depends(get_async_db)):
+        result = await db.execute(text("SELECT ..."), params)
+"""
+
+import logging
+import os
+import re
+import time
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import TextClause, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session
+
+try:
+    import asyncpg
+except ImportError:  # optional: queries fall back to SQLAlchemy
+    asyncpg = None
+
+logger = logging.getLogger("multi_modal_retail.pg_pool")
+
+PG_POOL_MAX_SIZE = int(os.getenv("PG_POOL_MAX_SIZE", "20"))
+PG_POOL_MAX_OVERFLOW = int(os.getenv("PG_POOL_MAX_OVERFLOW", "10"))
+# Set to 0 behind PgBouncer/Supavisor in transaction mode (no prepared statements)
+PG_STATEMENT_CACHE_SIZE = int(os.getenv("PG_STATEMENT_CACHE_SIZE", "100"))
+
+# Seconds fetch skips the pool (using the session) after it failed to connect
+_RETRY_AFTER_SECONDS = 60.0
+
+# ":name" bind parameters, matched exactly as sqlalchemy.text() does so the
+# pool and the session fallback accept the same SQL. text() does not bind
+# ":name::type", so such SQL is rejected rather than run differently on each
+# path (write CAST(:name AS type)); an escaped "\:" is a literal colon.
+_PARAM_RE = re.compile(r"(?<![:\w\x5c]):(\w+)(?![:\w])")
+_CAST_BIND_RE = re.compile(r"(?<![:\w\x5c]):(\w+)::")
+
+_database_url: Optional[str] = None
+_pool_failed_at: Optional[float] = None
+_async_engine: Optional[AsyncEngine] = None
+_async_sessionmaker: Optional[async_sessionmaker] = None
+
+
+def configure(database_url: str) -> None:
+    """Set the database the pool connects to (called once at startup)."""
+    global _database_url
+    _database_url = database_url
+
+
+@lru_cache(maxsize=256)
+def to_asyncpg(query: str) -> Tuple[str, Tuple[str, ...]]:
+    """Rewrite ":name" parameters as "$n" and return the parameter order."""
+    cast_bind = _CAST_BIND_RE.search(query)
+    if cast_bind:
+        raise ValueError(
+            f"Bind parameter :{cast_bind.group(1)} followed by '::' is not bound by "
+            f"text(); use CAST(:{cast_bind.group(1)} AS type)"
+        )
+    names: List[str] = []
+
+    def _sub(match: "re.Match[str]") -> str:
+        name = match.group(1)
+        if name not in names:
+            names.append(name)
+        return f"${names.index(name) + 1}"
+
+    # text() turns an escaped "\:" into a literal colon
+    return _PARAM_RE.sub(_sub, query).replace("\\:", ":"), tuple(names)
+
+
+@lru_cache(maxsize=256)
+def _text(query: str) -> TextClause:
+    """TextClause for the session fallback, built once per query string."""
+    return text(query)
+
+
+def _connect_kwargs(database_url: str) -> Dict[str, Any]:
+    """asyncpg connection arguments from a SQLAlchemy database URL."""
+    url = make_url(database_url)
+    query = dict(url.query)
+    kwargs: Dict[str, Any] = {
+        # hostaddr is set when DATABASE_URL was pinned to an IPv4 address
+        "host": query.get("hostaddr") or url.host,
+        "port": url.port or 5432,
+        "user": url.username,
+        "password": url.password,
+        "database": url.database,
+    }
+    if query.get("sslmode"):
+        kwargs["ssl"] = query["sslmode"]
+    return kwargs
+
+
+def _fetch_engine() -> Optional[AsyncEngine]:
+    """The async engine for fetch (None if asyncpg is missing or recently failed)."""
+    if asyncpg is None or not _database_url:
+        return None
+    if _pool_failed_at and time.monotonic() - _pool_failed_at < _RETRY_AFTER_SECONDS:
+        return None
+    return get_async_engine()
+
+
+def get_async_engine() -> AsyncEngine:
+    """Get the SQLAlchemy async engine (asyncpg driver), creating it on first use."""
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None:
+        if not _database_url:
+            raise RuntimeError("Database not configured. Did you call pg_pool.configure()?")
+        # Connection details go through connect_args so libpq-only query
+        # parameters (sslmode, hostaddr) never reach the asyncpg dialect
+        _async_engine = create_async_engine(
+            f"postgresql+asyncpg://?prepared_statement_cache_size={PG_STATEMENT_CACHE_SIZE}",
+            connect_args={
+                **_connect_kwargs(_database_url),
+                "statement_cache_size": PG_STATEMENT_CACHE_SIZE,
+            },
+            pool_size=PG_POOL_MAX_SIZE,
+            max_overflow=PG_POOL_MAX_OVERFLOW,
+            pool_pre_ping=True,
+            pool_recycle=1800,
+        )
+        _async_sessionmaker = async_sessionmaker(_async_engine, expire_on_commit=False)
+    return _async_engine
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Dependency for async database sessions."""
+    get_async_engine()
+    async with _async_sessionmaker() as session:
+        yield session
+
+
+async def close_pool() -> None:
+    """Close the async engine and its pool (on application shutdown)."""
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+
+
+async def fetch(db: Session, query: str, params: Dict[str, Any]) -> Sequence[Any]:
+    """
+    Run a read-only query on a pooled asyncpg connection, or on the session as a fallback.
+
+    Args:
+        db: Session used when the pool is unavailable
+        query: SQL with SQLAlchemy-style ":name" parameters
+        params: Parameter values by name
+
+    Returns:
+        Rows supporting positional access (row[0])
+    """
+    # Rewritten (and validated) up front so both paths reject the same SQL
+    global _pool_failed_at
+    sql, names = to_asyncpg(query)
+    engine = _fetch_engine()
+    if engine is not None:
+        try:
+            async with engine.connect() as conn:
+                # The driver connection skips SQLAlchemy's Row wrapping
+                raw = await conn.get_raw_connection()
+                return await raw.driver_connection.fetch(
+                    sql, *(params[name] for name in names)
+                )
+        except (
+            OSError,
+            DBAPIError,
+            asyncpg.InterfaceError,
+            asyncpg.PostgresConnectionError,
+        ) as e:
+            _pool_failed_at = time.monotonic()
+            logger.warning(f"asyncpg query failed, retrying on session: {e}")
+    return db.execute(_text(query), params).fetchall()
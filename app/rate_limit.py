@@ -0,0 +1,177 @@
+"""
+Per-IP sliding-window rate limiting backed by Redis.
+
+Each (endpoint, client IP) pair owns a sorted set of request timestamps.
+A Lua script trims entries older than the window, counts what is left and
+records the new request atomically, so limits hold across Uvicorn workers
+and replicas. Without REDIS_URL (or when Redis is unreachable) the same
+sliding window is kept in process memory; after a Redis error the limiter
+stays local for _RETRY_AFTER_SECONDS instead of waiting on Redis per request.
+
+Usage:
+    limiter = RateLimiter(os.getenv("REDIS_URL"))
+
+    @app.post("/api/stt")
+    @limiter.limit("10/minute")
+    async def stt(request: Request, ...):
+        ...
+"""
+
+import functools
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+from uuid import uuid4
+
+from fastapi import HTTPException, Request
+
+logger = logging.getLogger("multi_modal_retail.rate_limit")
+
+# KEYS[1] bucket key; ARGV: now_ms, window_ms, limit, member
+# Returns {allowed, retry_after_ms}
+SLIDING_WINDOW_LUA = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+
+redis.call('ZREMRANGEBYSCORE', key, 0, now - window)
+if redis.call('ZCARD', key) >= limit then
+    local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+    return {0, tonumber(oldest[2]) + window - now}
+end
+redis.call('ZADD', key, now, ARGV[4])
+redis.call('PEXPIRE', key, window)
+return {1, 0}
+"""
+
+# Seconds to use the local window before trying Redis again after an error
+_RETRY_AFTER_SECONDS = 60.0
+# How often idle keys are swept from the local window
+_SWEEP_INTERVAL_MS = 60_000
+
+_PERIOD_MS = {
+    "second": 1_000,
+    "minute": 60_000,
+    "hour": 3_600_000,
+    "day": 86_400_000,
+}
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """Parse a rate like "30/minute" into (limit, window_ms)."""
+    try:
+        count, period = rate.split("/", 1)
+        return int(count), _PERIOD_MS[period.strip().rstrip("s")]
+    except (ValueError, KeyError):
+        raise ValueError(f"Invalid rate limit: {rate!r} (expected e.g. '30/minute')")
+
+
+def get_remote_address(request: Request) -> str:
+    """Client IP for the request (falls back to localhost)."""
+    return request.client.host if request.client else "127.0.0.1"
+
+
+class RateLimiter:
+    """Sliding-window limiter shared by all decorated endpoints."""
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        key_func: Callable[[Request], str] = get_remote_address,
+        prefix: str = "ratelimit",
+    ):
+        self.redis_url = redis_url
+        self.key_func = key_func
+        self.prefix = prefix
+        self._redis = None
+        self._script = None
+        self._redis_failed_at: Optional[float] = None
+        self._local: Dict[str, Deque[int]] = {}
+        self._longest_window_ms = 0
+        self._last_sweep_ms = 0
+
+    def _get_script(self):
+        """Create the Redis client and register the Lua script on first use.
+
+        Returns None without REDIS_URL or within _RETRY_AFTER_SECONDS of an error.
+        """
+        if (
+            self._redis_failed_at
+            and time.monotonic() - self._redis_failed_at < _RETRY_AFTER_SECONDS
+        ):
+            return None
+        if self._script is None and self.redis_url:
+            import redis.asyncio as aioredis
+
+            self._redis = aioredis.from_url(
+                self.redis_url, socket_timeout=0.25, socket_connect_timeout=0.25
+            )
+            # register_script runs EVALSHA and loads the script on NOSCRIPT
+            self._script = self._redis.register_script(SLIDING_WINDOW_LUA)
+        return self._script
+
+    async def hit(self, key: str, limit: int, window_ms: int) -> Tuple[bool, int]:
+        """
+        Record a request against key.
+
+        Returns:
+            (allowed, retry_after_ms)
+        """
+        now_ms = int(time.time() * 1000)
+        script = self._get_script()
+        if script is not None:
+            try:
+                allowed, retry_after = await script(
+                    keys=[key], args=[now_ms, window_ms, limit, f"{now_ms}-{uuid4().hex}"]
+                )
+                self._redis_failed_at = None
+                return bool(allowed), int(retry_after)
+            except Exception as e:
+                self._redis_failed_at = time.monotonic()
+                logger.warning(f"Redis rate limit check failed, using local window: {e}")
+
+        # No awaits below, so this is atomic within the event loop
+        self._sweep(now_ms, window_ms)
+        hits = self._local.setdefault(key, deque())
+        while hits and hits[0] <= now_ms - window_ms:
+            hits.popleft()
+        if len(hits) >= limit:
+            return False, hits[0] + window_ms - now_ms
+        hits.append(now_ms)
+        return True, 0
+
+    def _sweep(self, now_ms: int, window_ms: int) -> None:
+        """Drop local keys with no hits inside the longest window in use."""
+        self._longest_window_ms = max(self._longest_window_ms, window_ms)
+        if now_ms - self._last_sweep_ms < _SWEEP_INTERVAL_MS:
+            return
+        self._last_sweep_ms = now_ms
+        cutoff = now_ms - self._longest_window_ms
+        for key in [k for k, hits in self._local.items() if not hits or hits[-1] <= cutoff]:
+            del self._local[key]
+
+    def limit(self, rate: str) -> Callable:
+        """Decorate an endpoint (which must accept `request: Request`)."""
+        max_requests, window_ms = parse_rate(rate)
+
+        def decorator(func: Callable) -> Callable:
+            scope = f"{func.__module__}.{func.__name__}"
+
+            @functools.wraps(func)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                request: Request = kwargs["request"]
+                key = f"{self.prefix}:{scope}:{self.key_func(request)}"
+                allowed, retry_after_ms = await self.hit(key, max_requests, window_ms)
+                if not allowed:
+                    raise HTTPException(
+                        status_code=429,
+                        detail=f"Rate limit exceeded: {rate}",
+                        headers={"Retry-After": str(max(1, -(-retry_after_ms // 1000)))},
+                    )
+                return await func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
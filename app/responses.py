@@ -0,0 +1,30 @@
+"""
+orjson-backed JSON response class.
+
+Used as the app's default response class and for the explicit responses
+returned by endpoints. orjson serializes datetimes, UUIDs and numpy values
+natively and is several times faster than the stdlib encoder behind
+Starlette's JSONResponse.
+"""
+
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    """Fallback for types orjson does not handle natively (e.g. NUMERIC columns)."""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
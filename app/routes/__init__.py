@@ -1,9 +1,22 @@
 """
 Route modules for MultiModal AI Retail App.
+
+Routers are loaded on first access, so importing one route module does not
+import the others.
 """
 
-from .stores import router as stores_router
-from .cart import router as cart_router
-from .orders import router as orders_router
+import importlib
+
+_LAZY_ROUTERS = {
+    "stores_router": "app.routes.stores",
+    "cart_router": "app.routes.cart",
+    "orders_router": "app.routes.orders",
+}
 
 __all__ = ["stores_router", "cart_router", "orders_router"]
+
+
+def __getattr__(name):
+    if name in _LAZY_ROUTERS:
+        return importlib.import_module(_LAZY_ROUTERS[name]).router
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -15,14 +15,14 @@ B-22: Coupon stacking logic (integrated)
 """
 
 import logging
+import re
 import time
 from typing import Dict, Any, List, Optional
 from collections import defaultdict
 from decimal import Decimal
-from uuid import UUID
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Query, Header
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from pydantic import BaseModel
 
@@ -30,12 +30,13 @@ logger = logging.getLogger("multi_modal_retail.cart")
 
 router = APIRouter(prefix="/api", tags=["cart"])
 
+from app.pg_pool import get_async_db
+from app.responses import ORJSONResponse
 from app.session_tracking import (
-    get_selected_store_id as _get_selected_store_id_for_session,
     get_shopping_session_id,
-    touch_shopping_session,
-    record_shopping_event,
+    track_shopping_event_async,
 )
+from app.store_cache import get_user_store_id_async
 
 # --- Pydantic Models ---
 
@@ -60,27 +61,17 @@ class CouponInteractionRequest(BaseModel):
 
 
 # --- Dependencies (imported from main) ---
+# Database sessions come from pg_pool.get_async_db; only auth is injected
 
-_db_dependency = None
 _token_dependency = None
 
 
-def set_dependencies(db_dependency, token_dependency):
+def set_dependencies(token_dependency):
     """Set the actual dependencies from main module."""
-    global _db_dependency, _token_dependency
-    _db_dependency = db_dependency
+    global _token_dependency
     _token_dependency = token_dependency
 
 
-def db_dep():
-    """DB dependency wrapper that defers to the injected dependency at runtime."""
-    if _db_dependency is None:
-        raise RuntimeError(
-            "DB dependency not configured. Did you call set_dependencies()?"
-        )
-    yield from _db_dependency()
-
-
 def token_dep(authorization: str = Header(None)) -> Dict[str, Any]:
     """Auth dependency wrapper that defers to the injected dependency at runtime."""
     if _token_dependency is None:
@@ -93,27 +84,314 @@ def token_dep(authorization: str = Header(None)) -> Dict[str, Any]:
 # --- Helper Functions ---
 
 
-def get_user_store_id(db: Session, user_id: str) -> Optional[str]:
-    """Get user's selected store ID."""
-    result = db.execute(
-        text("SELECT selected_store_id FROM user_preferences WHERE user_id = :user_id"),
-        {"user_id": user_id},
+# Canonical (hyphenated) UUID text, as the API hands IDs out
+_UUID_RE = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.IGNORECASE
+)
+
+
+def validate_uuid(value: str, label: str) -> None:
+    """Raise 400 unless value is a UUID string."""
+    if not _UUID_RE.fullmatch(value):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid {label} ID format: {value}",
+        )
+
+
+# get_cart payload. JSON is built in Postgres and passed through unparsed;
+# numeric columns are cast to float8 (NULLIF keeps "falsy means null" for
+# rating/max_discount), timestamps serialize as ISO 8601.
+CART_SQL = text("""
+    WITH pref AS (
+        SELECT selected_store_id AS store_id
+        FROM user_preferences
+        WHERE user_id = :user_id
+    )
+    SELECT
+        pref.store_id,
+        st.store,
+        it.items,
+        it.product_count,
+        it.item_count,
+        cp.coupons,
+        cp.coupon_count
+    FROM pref
+    LEFT JOIN LATERAL (
+        SELECT json_build_object('id', s.id::text, 'name', s.name)::text AS store
+        FROM stores s
+        WHERE s.id = pref.store_id
+    ) st ON true
+    CROSS JOIN LATERAL (
+        SELECT
+            COALESCE(
+                json_agg(
+                    json_build_object(
+                        'cart_item_id', ci.id::text,
+                        'quantity', ci.quantity,
+                        'added_at', ci.created_at,
+                        'product', json_build_object(
+                            'id', p.id::text,
+                            'name', p.name,
+                            'description', p.description,
+                            'image_url', p.image_url,
+                            'price', COALESCE(p.price, 0)::float8,
+                            'rating', NULLIF(p.rating, 0)::float8,
+                            'review_count', COALESCE(p.review_count, 0),
+                            'category', p.category,
+                            'brand', p.brand,
+                            'promo_text', p.promo_text
+                        ),
+                        'available_quantity', COALESCE(si.quantity, 0),
+                        'line_total', COALESCE(p.price * ci.quantity, 0)::float8
+                    )
+                    ORDER BY ci.created_at DESC
+                ),
+                '[]'
+            )::text AS items,
+            COUNT(*) AS product_count,
+            COALESCE(SUM(ci.quantity), 0) AS item_count
+        FROM cart_items ci
+        JOIN products p ON ci.product_id = p.id
+        LEFT JOIN store_inventory si ON si.product_id = p.id AND si.store_id = ci.store_id
+        WHERE ci.user_id = :user_id AND ci.store_id = pref.store_id
+    ) it
+    CROSS JOIN LATERAL (
+        SELECT
+            COALESCE(
+                json_agg(
+                    json_build_object(
+                        'id', c.id::text,
+                        'type', c.type,
+                        'discount_details', c.discount_details,
+                        'category_or_brand', c.category_or_brand,
+                        'expiration_date', c.expiration_date,
+                        'terms', c.terms,
+                        'discount_type', c.discount_type,
+                        'discount_value', COALESCE(c.discount_value, 0)::float8,
+                        'min_purchase_amount', COALESCE(c.min_purchase_amount, 0)::float8,
+                        'max_discount', NULLIF(c.max_discount, 0)::float8
+                    )
+                    ORDER BY c.type, c.created_at
+                ),
+                '[]'
+            )::text AS coupons,
+            COUNT(*) AS coupon_count
+        FROM cart_coupons cc
+        JOIN coupons c ON cc.coupon_id = c.id
+        WHERE cc.user_id = :user_id
+    ) cp
+""")
+
+
+# add_to_cart pre-checks: always one row; NULL columns mark what is missing
+ADD_TO_CART_CHECK_SQL = text("""
+    WITH pref AS (
+        SELECT selected_store_id FROM user_preferences WHERE user_id = :user_id
     )
-    row = result.fetchone()
-    return str(row[0]) if row and row[0] else None
-
-
-def check_inventory(db: Session, store_id: str, product_id: str, quantity: int) -> bool:
-    """Check if store has enough inventory for the requested quantity."""
-    result = db.execute(
-        text("""
-            SELECT quantity FROM store_inventory
-            WHERE store_id = :store_id AND product_id = :product_id
-        """),
-        {"store_id": store_id, "product_id": product_id},
+    SELECT
+        (SELECT selected_store_id FROM pref) AS store_id,
+        p.id,
+        p.name,
+        p.price,
+        (
+            SELECT si.quantity FROM store_inventory si
+            WHERE si.store_id = (SELECT selected_store_id FROM pref)
+              AND si.product_id = :product_id
+        ) AS stock
+    FROM (SELECT 1) AS one
+    LEFT JOIN products p ON p.id = :product_id
+""")
+
+
+# get_eligible_coupons: one row per active coupon (or a single NULL-coupon row
+# when there are none) with the cart subtotal and eligibility evaluated in SQL
+ELIGIBLE_COUPONS_SQL = text("""
+    WITH cart_agg AS (
+        SELECT
+            COALESCE(SUM(ci.quantity * p.price), 0) AS subtotal,
+            array_agg(DISTINCT lower(p.category)) AS cats,
+            array_agg(DISTINCT lower(p.brand)) AS brands
+        FROM cart_items ci
+        JOIN products p ON ci.product_id = p.id
+        WHERE ci.user_id = :user_id AND ci.store_id = :store_id
     )
-    row = result.fetchone()
-    return row and row[0] >= quantity
+    SELECT
+        c.id,
+        c.type,
+        c.discount_details,
+        c.category_or_brand,
+        c.expiration_date,
+        c.terms,
+        c.discount_type,
+        COALESCE(c.discount_value, 0) AS discount_value,
+        COALESCE(c.min_purchase_amount, 0) AS min_purchase_amount,
+        c.max_discount,
+        c.is_selected,
+        COALESCE(
+            CASE c.type
+                WHEN 'frontstore'
+                    THEN cart_agg.subtotal >= COALESCE(c.min_purchase_amount, 0)
+                WHEN 'category' THEN lower(c.category_or_brand) = ANY(cart_agg.cats)
+                WHEN 'brand' THEN lower(c.category_or_brand) = ANY(cart_agg.brands)
+            END,
+            false
+        ) AS is_eligible,
+        cart_agg.subtotal
+    FROM cart_agg
+    LEFT JOIN LATERAL (
+        SELECT
+            c.*,
+            (cc.coupon_id IS NOT NULL) AS is_selected
+        FROM coupons c
+        JOIN user_coupons uc ON c.id = uc.coupon_id
+        LEFT JOIN cart_coupons cc
+            ON cc.coupon_id = c.id AND cc.user_id = :user_id
+        WHERE uc.user_id = :user_id
+          AND uc.eligible_until > NOW()
+          AND c.expiration_date > NOW()
+          AND (c.is_active IS NULL OR c.is_active = true)
+    ) c ON true
+    ORDER BY
+        CASE c.type
+            WHEN 'frontstore' THEN 1
+            WHEN 'category' THEN 2
+            WHEN 'brand' THEN 3
+            ELSE 4
+        END,
+        c.discount_value DESC NULLS LAST
+""")
+
+
+COUPON_DATA_CART_ITEMS_SQL = text("""
+    SELECT
+        ci.id as cart_item_id,
+        ci.quantity,
+        p.id as product_id,
+        p.name as product_name,
+        p.price,
+        p.category,
+        p.brand
+    FROM cart_items ci
+    JOIN products p ON ci.product_id = p.id
+    WHERE ci.user_id = :user_id AND ci.store_id = :store_id
+""")
+
+SELECTED_COUPONS_SQL = text("""
+    SELECT c.id, c.type, c.discount_details, c.category_or_brand,
+           c.discount_type, c.discount_value, c.min_purchase_amount, c.max_discount
+    FROM cart_coupons cc
+    JOIN coupons c ON cc.coupon_id = c.id
+    WHERE cc.user_id = :user_id
+""")
+
+ACTIVE_USER_COUPONS_SQL = text("""
+    SELECT c.id, c.type, c.discount_details, c.category_or_brand,
+           c.expiration_date, c.terms, c.discount_type, c.discount_value,
+           c.min_purchase_amount, c.max_discount
+    FROM coupons c
+    JOIN user_coupons uc ON c.id = uc.coupon_id
+    WHERE uc.user_id = :user_id
+      AND uc.eligible_until > NOW()
+      AND c.expiration_date > NOW()
+      AND (c.is_active IS NULL OR c.is_active = true)
+""")
+
+UPSERT_CART_ITEM_SQL = text("""
+    INSERT INTO cart_items (user_id, store_id, product_id, quantity)
+    VALUES (:user_id, :store_id, :product_id, :quantity)
+    ON CONFLICT (user_id, store_id, product_id)
+    DO UPDATE SET
+        quantity = cart_items.quantity + EXCLUDED.quantity,
+        updated_at = CURRENT_TIMESTAMP
+    RETURNING id, quantity
+""")
+
+CART_ITEM_WITH_STOCK_SQL = text("""
+    SELECT ci.id, p.name, p.price, si.quantity
+    FROM cart_items ci
+    JOIN products p ON ci.product_id = p.id
+    LEFT JOIN store_inventory si
+      ON si.store_id = ci.store_id AND si.product_id = ci.product_id
+    WHERE ci.id = :item_id AND ci.user_id = :user_id
+""")
+
+UPDATE_CART_ITEM_QUANTITY_SQL = text("""
+    UPDATE cart_items
+    SET quantity = :quantity, updated_at = CURRENT_TIMESTAMP
+    WHERE id = :item_id AND user_id = :user_id
+""")
+
+CART_ITEM_OWNER_SQL = text(
+    "SELECT id FROM cart_items WHERE id = :item_id AND user_id = :user_id"
+)
+
+DELETE_CART_ITEM_SQL = text(
+    "DELETE FROM cart_items WHERE id = :item_id AND user_id = :user_id"
+)
+
+# Both deletes in one statement; returns (items_removed, coupons_removed)
+CLEAR_CART_SQL = text("""
+    WITH items AS (
+        DELETE FROM cart_items WHERE user_id = :user_id RETURNING 1
+    ),
+    coupons AS (
+        DELETE FROM cart_coupons WHERE user_id = :user_id RETURNING 1
+    )
+    SELECT
+        (SELECT COUNT(*) FROM items),
+        (SELECT COUNT(*) FROM coupons)
+""")
+
+ASSIGNED_COUPON_SQL = text("""
+    SELECT c.id, c.type, c.discount_details, c.category_or_brand
+    FROM coupons c
+    JOIN user_coupons uc ON c.id = uc.coupon_id
+    WHERE c.id = :coupon_id
+      AND uc.user_id = :user_id
+      AND uc.eligible_until > NOW()
+      AND c.expiration_date > NOW()
+""")
+
+# Cart coupon mutations write the coupon_interactions row in the same
+# statement; the interaction is recorded whether or not the cart row changed
+ADD_CART_COUPON_SQL = text("""
+    WITH ins AS (
+        INSERT INTO cart_coupons (user_id, coupon_id)
+        VALUES (:user_id, :coupon_id)
+        ON CONFLICT (user_id, coupon_id) DO NOTHING
+    )
+    INSERT INTO coupon_interactions (user_id, coupon_id, action)
+    VALUES (:user_id, :coupon_id, 'added_to_cart')
+""")
+
+REMOVE_CART_COUPON_SQL = text("""
+    WITH del AS (
+        DELETE FROM cart_coupons
+        WHERE user_id = :user_id AND coupon_id = :coupon_id
+    )
+    INSERT INTO coupon_interactions (user_id, coupon_id, action)
+    VALUES (:user_id, :coupon_id, 'removed_from_cart')
+""")
+
+CART_SUMMARY_ITEMS_SQL = text("""
+    SELECT
+        ci.id as cart_item_id,
+        ci.quantity,
+        p.id as product_id,
+        p.name,
+        p.price,
+        p.category,
+        p.brand
+    FROM cart_items ci
+    JOIN products p ON ci.product_id = p.id
+    WHERE ci.user_id = :user_id AND ci.store_id = :store_id
+""")
+
+INSERT_COUPON_INTERACTION_SQL = text("""
+    INSERT INTO coupon_interactions (user_id, coupon_id, action, order_id)
+    VALUES (:user_id, :coupon_id, :action, :order_id)
+""")
 
 
 def _calc_discount(coupon_row, amount: Decimal) -> Decimal:
@@ -134,26 +412,14 @@ def _calc_discount(coupon_row, amount: Decimal) -> Decimal:
     return Decimal("0")
 
 
-def _calculate_cart_data_for_response(db: Session, user_id: str, store_id: str) -> dict:
+async def _calculate_cart_data_for_response(db: AsyncSession, user_id: str, store_id: str) -> dict:
     """
     Calculate summary and eligibility in one pass for coupon endpoints.
     Returns dict with: summary, eligible, ineligible
     """
     # Get cart items with product details
-    items_result = db.execute(
-        text("""
-            SELECT
-                ci.id as cart_item_id,
-                ci.quantity,
-                p.id as product_id,
-                p.name as product_name,
-                p.price,
-                p.category,
-                p.brand
-            FROM cart_items ci
-            JOIN products p ON ci.product_id = p.id
-            WHERE ci.user_id = :user_id AND ci.store_id = :store_id
-        """),
+    items_result = await db.execute(
+        COUPON_DATA_CART_ITEMS_SQL,
         {"user_id": user_id, "store_id": store_id},
     )
     items = items_result.fetchall()
@@ -185,32 +451,16 @@ def _calculate_cart_data_for_response(db: Session, user_id: str, store_id: str)
         subtotal += Decimal(str(item[4])) * item[1]  # price * quantity
 
     # Get selected coupons
-    selected_result = db.execute(
-        text("""
-            SELECT c.id, c.type, c.discount_details, c.category_or_brand,
-                   c.discount_type, c.discount_value, c.min_purchase_amount, c.max_discount
-            FROM cart_coupons cc
-            JOIN coupons c ON cc.coupon_id = c.id
-            WHERE cc.user_id = :user_id
-        """),
+    selected_result = await db.execute(
+        SELECTED_COUPONS_SQL,
         {"user_id": user_id},
     )
     selected_coupons = selected_result.fetchall()
     selected_ids = {str(row[0]) for row in selected_coupons}
 
     # Get all user coupons for eligibility
-    all_coupons_result = db.execute(
-        text("""
-            SELECT c.id, c.type, c.discount_details, c.category_or_brand,
-                   c.expiration_date, c.terms, c.discount_type, c.discount_value,
-                   c.min_purchase_amount, c.max_discount
-            FROM coupons c
-            JOIN user_coupons uc ON c.id = uc.coupon_id
-            WHERE uc.user_id = :user_id
-              AND uc.eligible_until > NOW()
-              AND c.expiration_date > NOW()
-              AND (c.is_active IS NULL OR c.is_active = true)
-        """),
+    all_coupons_result = await db.execute(
+        ACTIVE_USER_COUPONS_SQL,
         {"user_id": user_id},
     )
     all_coupons = all_coupons_result.fetchall()
@@ -362,8 +612,8 @@ def _calculate_cart_data_for_response(db: Session, user_id: str, store_id: str)
 
 @router.get("/cart")
 async def get_cart(
-    user: Dict[str, Any] = Depends(token_dep), db: Session = Depends(db_dep)
-) -> JSONResponse:
+    user: Dict[str, Any] = Depends(token_dep), db: AsyncSession = Depends(get_async_db)
+) -> ORJSONResponse:
     """
     B-8: Get user's cart items with product details and selected coupons.
     Returns: { "items": [...], "coupons": [...], "store": {...}, "item_count": int }
@@ -371,11 +621,12 @@ async def get_cart(
     user_id = user["user_id"]
 
     try:
-        # Get user's selected store
-        store_id = get_user_store_id(db, user_id)
+        # Store, items and coupons built as JSON by Postgres in one round trip
+        result = await db.execute(CART_SQL, {"user_id": user_id})
+        cart = result.fetchone()
 
-        if not store_id:
-            return JSONResponse(
+        if not cart or not cart.store_id:
+            return ORJSONResponse(
                 {
                     "items": [],
                     "coupons": [],
@@ -386,116 +637,15 @@ async def get_cart(
                 status_code=200,
             )
 
-        # Get store info
-        store_result = db.execute(
-            text("SELECT id, name FROM stores WHERE id = :store_id"),
-            {"store_id": store_id},
-        )
-        store_row = store_result.fetchone()
-        store = {"id": str(store_row[0]), "name": store_row[1]} if store_row else None
-
-        # Get cart items with product details and inventory
-        result = db.execute(
-            text("""
-                SELECT
-                    ci.id as cart_item_id,
-                    ci.quantity,
-                    ci.created_at,
-                    p.id as product_id,
-                    p.name,
-                    p.description,
-                    p.image_url,
-                    p.price,
-                    p.rating,
-                    p.review_count,
-                    p.category,
-                    p.brand,
-                    p.promo_text,
-                    si.quantity as available_quantity
-                FROM cart_items ci
-                JOIN products p ON ci.product_id = p.id
-                LEFT JOIN store_inventory si ON si.product_id = p.id AND si.store_id = ci.store_id
-                WHERE ci.user_id = :user_id AND ci.store_id = :store_id
-                ORDER BY ci.created_at DESC
-            """),
-            {"user_id": user_id, "store_id": store_id},
-        )
-        rows = result.fetchall()
-
-        items = []
-        for row in rows:
-            items.append(
-                {
-                    "cart_item_id": str(row[0]),
-                    "quantity": row[1],
-                    "added_at": row[2].isoformat() if row[2] else None,
-                    "product": {
-                        "id": str(row[3]),
-                        "name": row[4],
-                        "description": row[5],
-                        "image_url": row[6],
-                        "price": float(row[7]) if row[7] else 0.0,
-                        "rating": float(row[8]) if row[8] else None,
-                        "review_count": row[9] or 0,
-                        "category": row[10],
-                        "brand": row[11],
-                        "promo_text": row[12],
-                    },
-                    "available_quantity": row[13] or 0,
-                    "line_total": float(row[7] * row[1]) if row[7] else 0.0,
-                }
-            )
-
-        # Get selected coupons
-        coupon_result = db.execute(
-            text("""
-                SELECT
-                    c.id,
-                    c.type,
-                    c.discount_details,
-                    c.category_or_brand,
-                    c.expiration_date,
-                    c.terms,
-                    c.discount_type,
-                    c.discount_value,
-                    c.min_purchase_amount,
-                    c.max_discount
-                FROM cart_coupons cc
-                JOIN coupons c ON cc.coupon_id = c.id
-                WHERE cc.user_id = :user_id
-                ORDER BY c.type, c.created_at
-            """),
-            {"user_id": user_id},
-        )
-        coupon_rows = coupon_result.fetchall()
-
-        coupons = [
-            {
-                "id": str(row[0]),
-                "type": row[1],
-                "discount_details": row[2],
-                "category_or_brand": row[3],
-                "expiration_date": row[4].isoformat() if row[4] else None,
-                "terms": row[5],
-                "discount_type": row[6],
-                "discount_value": float(row[7]) if row[7] else 0,
-                "min_purchase_amount": float(row[8]) if row[8] else 0,
-                "max_discount": float(row[9]) if row[9] else None,
-            }
-            for row in coupon_rows
-        ]
-
-        item_count = sum(item["quantity"] for item in items)
-
         logger.info(
-            f"User {user_id} cart: {len(items)} products, {item_count} items, {len(coupons)} coupons"
+            f"User {user_id} cart: {cart.product_count} products, {cart.item_count} items, {cart.coupon_count} coupons"
         )
-        return JSONResponse(
+        return ORJSONResponse(
             {
-                "items": items,
-                "coupons": coupons,
-                "store": store,
-                "item_count": item_count,
+                "items": orjson.Fragment(cart.items),
+                "coupons": orjson.Fragment(cart.coupons),
+                "store": orjson.Fragment(cart.store) if cart.store else None,
+                "item_count": cart.item_count,
             },
             status_code=200,
         )
@@ -513,8 +663,8 @@ async def add_to_cart(
     request: AddToCartRequest,
     http_request: Request,
     user: Dict[str, Any] = Depends(token_dep),
-    db: Session = Depends(db_dep),
-) -> JSONResponse:
+    db: AsyncSession = Depends(get_async_db),
+) -> ORJSONResponse:
     """
     B-9: Add item to cart.
     Returns: { "success": true, "cart_item": {...} }
@@ -523,14 +673,7 @@ async def add_to_cart(
     product_id = request.product_id
     quantity = request.quantity
 
-    # Validate product_id is UUID
-    try:
-        UUID(product_id)
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid product ID format: {product_id}",
-        )
+    validate_uuid(product_id, "product")
 
     if quantity < 1:
         raise HTTPException(
@@ -539,44 +682,34 @@ async def add_to_cart(
         )
 
     try:
-        # Get user's selected store
-        store_id = get_user_store_id(db, user_id)
+        # Selected store, product and stock in one round trip
+        result = await db.execute(
+            ADD_TO_CART_CHECK_SQL,
+            {"user_id": user_id, "product_id": product_id},
+        )
+        store_id, found_product_id, product_name, unit_price, stock = result.fetchone()
 
         if not store_id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Please select a store first",
             )
+        store_id = str(store_id)
 
-        # Verify product exists
-        product_result = db.execute(
-            text("SELECT id, name, price FROM products WHERE id = :product_id"),
-            {"product_id": product_id},
-        )
-        product_row = product_result.fetchone()
-
-        if not product_row:
+        if not found_product_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Product not found: {product_id}",
             )
 
-        # Check inventory
-        if not check_inventory(db, store_id, product_id, quantity):
+        if stock is None or stock < quantity:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, detail="Insufficient inventory"
             )
 
         # Add or update cart item
-        db.execute(
-            text("""
-                INSERT INTO cart_items (user_id, store_id, product_id, quantity)
-                VALUES (:user_id, :store_id, :product_id, :quantity)
-                ON CONFLICT (user_id, store_id, product_id)
-                DO UPDATE SET
-                    quantity = cart_items.quantity + EXCLUDED.quantity,
-                    updated_at = CURRENT_TIMESTAMP
-            """),
+        result = await db.execute(
+            UPSERT_CART_ITEM_SQL,
             {
                 "user_id": user_id,
                 "store_id": store_id,
@@ -584,17 +717,12 @@ async def add_to_cart(
                 "quantity": quantity,
             },
         )
+        cart_item_id, cart_quantity = result.fetchone()
 
         # Session event tracking (best-effort inside transaction)
         session_id = get_shopping_session_id(http_request)
         if session_id:
-            touch_shopping_session(
-                db,
-                session_id=session_id,
-                user_id=user_id,
-                store_id=_get_selected_store_id_for_session(db, user_id),
-            )
-            record_shopping_event(
+            await track_shopping_event_async(
                 db,
                 session_id=session_id,
                 user_id=user_id,
@@ -606,38 +734,24 @@ async def add_to_cart(
                 },
             )
 
-        db.commit()
-
-        # Get updated cart item
-        result = db.execute(
-            text("""
-                SELECT ci.id, ci.quantity, p.name, p.price
-                FROM cart_items ci
-                JOIN products p ON ci.product_id = p.id
-                WHERE ci.user_id = :user_id
-                  AND ci.store_id = :store_id
-                  AND ci.product_id = :product_id
-            """),
-            {"user_id": user_id, "store_id": store_id, "product_id": product_id},
-        )
-        row = result.fetchone()
+        await db.commit()
 
         cart_item = {
-            "id": str(row[0]),
-            "quantity": row[1],
-            "product_name": row[2],
-            "unit_price": float(row[3]) if row[3] else 0,
-            "line_total": float(row[3] * row[1]) if row[3] else 0,
+            "id": str(cart_item_id),
+            "quantity": cart_quantity,
+            "product_name": product_name,
+            "unit_price": float(unit_price) if unit_price else 0,
+            "line_total": float(unit_price * cart_quantity) if unit_price else 0,
         }
 
-        logger.info(f"User {user_id} added {quantity}x {product_row[1]} to cart")
-        return JSONResponse({"success": True, "cart_item": cart_item}, status_code=200)
+        logger.info(f"User {user_id} added {quantity}x {product_name} to cart")
+        return ORJSONResponse({"success": True, "cart_item": cart_item}, status_code=200)
 
     except HTTPException:
         raise
     except Exception as e:
         logger.exception(f"Failed to add to cart for user {user_id}: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to add to cart: {str(e)}",
@@ -650,13 +764,14 @@ async def update_cart_item(
     request: UpdateCartItemRequest,
     http_request: Request,
     user: Dict[str, Any] = Depends(token_dep),
-    db: Session = Depends(db_dep),
-) -> JSONResponse:
+    db: AsyncSession = Depends(get_async_db),
+) -> ORJSONResponse:
     """
     B-10: Update cart item quantity.
     Returns: { "success": true, "cart_item": {...} }
     """
     user_id = user["user_id"]
+    validate_uuid(item_id, "cart item")
     quantity = request.quantity
 
     if quantity < 1:
@@ -666,14 +781,9 @@ async def update_cart_item(
         )
 
     try:
-        # Get cart item
-        result = db.execute(
-            text("""
-                SELECT ci.id, ci.store_id, ci.product_id, p.name
-                FROM cart_items ci
-                JOIN products p ON ci.product_id = p.id
-                WHERE ci.id = :item_id AND ci.user_id = :user_id
-            """),
+        # Get cart item with its product and current stock
+        result = await db.execute(
+            CART_ITEM_WITH_STOCK_SQL,
             {"item_id": item_id, "user_id": user_id},
         )
         row = result.fetchone()
@@ -683,35 +793,24 @@ async def update_cart_item(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Cart item not found"
             )
 
-        store_id = str(row[1])
-        product_id = str(row[2])
+        cart_item_id, product_name, unit_price, stock = row
 
         # Check inventory
-        if not check_inventory(db, store_id, product_id, quantity):
+        if stock is None or stock < quantity:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Insufficient inventory for requested quantity",
             )
 
         # Update quantity
-        db.execute(
-            text("""
-                UPDATE cart_items
-                SET quantity = :quantity, updated_at = CURRENT_TIMESTAMP
-                WHERE id = :item_id AND user_id = :user_id
-            """),
+        await db.execute(
+            UPDATE_CART_ITEM_QUANTITY_SQL,
             {"quantity": quantity, "item_id": item_id, "user_id": user_id},
         )
 
         session_id = get_shopping_session_id(http_request)
         if session_id:
-            touch_shopping_session(
-                db,
-                session_id=session_id,
-                user_id=user_id,
-                store_id=_get_selected_store_id_for_session(db, user_id),
-            )
-            record_shopping_event(
+            await track_shopping_event_async(
                 db,
                 session_id=session_id,
                 user_id=user_id,
@@ -719,40 +818,27 @@ async def update_cart_item(
                 payload={"cart_item_id": item_id, "quantity": quantity},
             )
 
-        db.commit()
-
-        # Get updated cart item
-        result = db.execute(
-            text("""
-                SELECT ci.id, ci.quantity, p.name, p.price
-                FROM cart_items ci
-                JOIN products p ON ci.product_id = p.id
-                WHERE ci.id = :item_id
-            """),
-            {"item_id": item_id},
-        )
-        updated_row = result.fetchone()
+        await db.commit()
 
+        # The row was set to exactly this quantity; no re-read needed
         cart_item = {
-            "id": str(updated_row[0]),
-            "quantity": updated_row[1],
-            "product_name": updated_row[2],
-            "unit_price": float(updated_row[3]) if updated_row[3] else 0,
-            "line_total": float(updated_row[3] * updated_row[1])
-            if updated_row[3]
-            else 0,
+            "id": str(cart_item_id),
+            "quantity": quantity,
+            "product_name": product_name,
+            "unit_price": float(unit_price) if unit_price else 0,
+            "line_total": float(unit_price * quantity) if unit_price else 0,
         }
 
         logger.info(
             f"User {user_id} updated cart item {item_id} to quantity {quantity}"
         )
-        return JSONResponse({"success": True, "cart_item": cart_item}, status_code=200)
+        return ORJSONResponse({"success": True, "cart_item": cart_item}, status_code=200)
 
     except HTTPException:
         raise
     except Exception as e:
         logger.exception(f"Failed to update cart item for user {user_id}: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update cart item: {str(e)}",
@@ -764,20 +850,19 @@ async def remove_cart_item(
     item_id: str,
     http_request: Request,
     user: Dict[str, Any] = Depends(token_dep),
-    db: Session = Depends(db_dep),
-) -> JSONResponse:
+    db: AsyncSession = Depends(get_async_db),
+) -> ORJSONResponse:
     """
     B-11: Remove item from cart.
     Returns: { "success": true }
     """
     user_id = user["user_id"]
+    validate_uuid(item_id, "cart item")
 
     try:
         # Verify item belongs to user
-        result = db.execute(
-            text(
-                "SELECT id FROM cart_items WHERE id = :item_id AND user_id = :user_id"
-            ),
+        result = await db.execute(
+            CART_ITEM_OWNER_SQL,
             {"item_id": item_id, "user_id": user_id},
         )
         if not result.fetchone():
@@ -785,20 +870,14 @@ async def remove_cart_item(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Cart item not found"
             )
 
-        db.execute(
-            text("DELETE FROM cart_items WHERE id = :item_id AND user_id = :user_id"),
+        await db.execute(
+            DELETE_CART_ITEM_SQL,
             {"item_id": item_id, "user_id": user_id},
         )
 
         session_id = get_shopping_session_id(http_request)
         if session_id:
-            touch_shopping_session(
-                db,
-                session_id=session_id,
-                user_id=user_id,
-                store_id=_get_selected_store_id_for_session(db, user_id),
-            )
-            record_shopping_event(
+            await track_shopping_event_async(
                 db,
                 session_id=session_id,
                 user_id=user_id,
@@ -806,16 +885,16 @@ async def remove_cart_item(
                 payload={"cart_item_id": item_id},
             )
 
-        db.commit()
+        await db.commit()
 
         logger.info(f"User {user_id} removed cart item {item_id}")
-        return JSONResponse({"success": True}, status_code=200)
+        return ORJSONResponse({"success": True}, status_code=200)
 
     except HTTPException:
         raise
     except Exception as e:
         logger.exception(f"Failed to remove cart item for user {user_id}: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to remove cart item: {str(e)}",
@@ -826,8 +905,8 @@ async def remove_cart_item(
 async def clear_cart(
     http_request: Request,
     user: Dict[str, Any] = Depends(token_dep),
-    db: Session = Depends(db_dep),
-) -> JSONResponse:
+    db: AsyncSession = Depends(get_async_db),
+) -> ORJSONResponse:
     """
     B-12: Clear entire cart (items and coupons).
     Returns: { "success": true, "items_removed": int, "coupons_removed": int }
@@ -835,38 +914,15 @@ async def clear_cart(
     user_id = user["user_id"]
 
     try:
-        # Count items before delete
-        items_result = db.execute(
-            text("SELECT COUNT(*) FROM cart_items WHERE user_id = :user_id"),
-            {"user_id": user_id},
-        )
-        items_count = items_result.scalar() or 0
-
-        coupons_result = db.execute(
-            text("SELECT COUNT(*) FROM cart_coupons WHERE user_id = :user_id"),
-            {"user_id": user_id},
-        )
-        coupons_count = coupons_result.scalar() or 0
-
-        # Delete items and coupons
-        db.execute(
-            text("DELETE FROM cart_items WHERE user_id = :user_id"),
-            {"user_id": user_id},
-        )
-        db.execute(
-            text("DELETE FROM cart_coupons WHERE user_id = :user_id"),
+        result = await db.execute(
+            CLEAR_CART_SQL,
             {"user_id": user_id},
         )
+        items_count, coupons_count = result.one()
 
         session_id = get_shopping_session_id(http_request)
         if session_id:
-            touch_shopping_session(
-                db,
-                session_id=session_id,
-                user_id=user_id,
-                store_id=_get_selected_store_id_for_session(db, user_id),
-            )
-            record_shopping_event(
+            await track_shopping_event_async(
                 db,
                 session_id=session_id,
                 user_id=user_id,
@@ -877,12 +933,12 @@ async def clear_cart(
                 },
             )
 
-        db.commit()
+        await db.commit()
 
         logger.info(
             f"User {user_id} cleared cart: {items_count} items, {coupons_count} coupons"
         )
-        return JSONResponse(
+        return ORJSONResponse(
             {
                 "success": True,
                 "items_removed": items_count,
@@ -893,7 +949,7 @@ async def clear_cart(
 
     except Exception as e:
         logger.exception(f"Failed to clear cart for user {user_id}: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to clear cart: {str(e)}",
@@ -902,8 +958,8 @@ async def clear_cart(
 
 @router.get("/coupons/eligible")
 async def get_eligible_coupons(
-    user: Dict[str, Any] = Depends(token_dep), db: Session = Depends(db_dep)
-) -> JSONResponse:
+    user: Dict[str, Any] = Depends(token_dep), db: AsyncSession = Depends(get_async_db)
+) -> ORJSONResponse:
     """
     B-14: Get coupons eligible for current cart.
     Checks user's assigned coupons against cart contents.
@@ -913,140 +969,73 @@ async def get_eligible_coupons(
 
     try:
         # Get cart contents
-        store_id = get_user_store_id(db, user_id)
+        store_id = await get_user_store_id_async(db, user_id)
         if not store_id:
-            return JSONResponse(
+            return ORJSONResponse(
                 {"eligible": [], "ineligible": [], "message": "no_store_selected"},
                 status_code=200,
             )
 
-        # Get cart items with categories and brands
-        cart_result = db.execute(
-            text("""
-                SELECT
-                    p.category,
-                    p.brand,
-                    SUM(ci.quantity * p.price) as subtotal
-                FROM cart_items ci
-                JOIN products p ON ci.product_id = p.id
-                WHERE ci.user_id = :user_id AND ci.store_id = :store_id
-                GROUP BY p.category, p.brand
-            """),
-            {"user_id": user_id, "store_id": store_id},
-        )
-        cart_rows = cart_result.fetchall()
-
-        cart_categories = set()
-        cart_brands = set()
-        cart_subtotal = Decimal("0")
-
-        for row in cart_rows:
-            if row[0]:
-                cart_categories.add(row[0].lower())
-            if row[1]:
-                cart_brands.add(row[1].lower())
-            cart_subtotal += Decimal(str(row[2])) if row[2] else Decimal("0")
-
-        # Get user's coupons
-        coupon_result = db.execute(
-            text("""
-                SELECT
-                    c.id,
-                    c.type,
-                    c.discount_details,
-                    c.category_or_brand,
-                    c.expiration_date,
-                    c.terms,
-                    c.discount_type,
-                    c.discount_value,
-                    c.min_purchase_amount,
-                    c.max_discount
-                FROM coupons c
-                JOIN user_coupons uc ON c.id = uc.coupon_id
-                WHERE uc.user_id = :user_id
-                  AND uc.eligible_until > NOW()
-                  AND c.expiration_date > NOW()
-                  AND (c.is_active IS NULL OR c.is_active = true)
-                ORDER BY
-                    CASE c.type
-                        WHEN 'frontstore' THEN 1
-                        WHEN 'category' THEN 2
-                        WHEN 'brand' THEN 3
-                        ELSE 4
-                    END,
-                    c.discount_value DESC NULLS LAST
-            """),
-            {"user_id": user_id},
-        )
-        coupon_rows = coupon_result.fetchall()
-
-        # Get already selected coupons
-        selected_result = db.execute(
-            text("SELECT coupon_id FROM cart_coupons WHERE user_id = :user_id"),
-            {"user_id": user_id},
+        result = await db.execute(
+            ELIGIBLE_COUPONS_SQL, {"user_id": user_id, "store_id": store_id}
         )
-        selected_ids = {str(row[0]) for row in selected_result.fetchall()}
+        rows = result.fetchall()
+        cart_subtotal = rows[0][12] if rows else Decimal("0")
 
         eligible = []
         ineligible = []
 
-        for row in coupon_rows:
+        for (
+            cid,
+            ctype,
+            details,
+            cat_or_brand,
+            expires,
+            terms,
+            dtype,
+            dvalue,
+            min_amount,
+            max_disc,
+            is_selected,
+            is_eligible,
+            _,
+        ) in rows:
+            if cid is None:
+                continue
             coupon = {
-                "id": str(row[0]),
-                "type": row[1],
-                "discount_details": row[2],
-                "category_or_brand": row[3],
-                "expiration_date": row[4].isoformat() if row[4] else None,
-                "terms": row[5],
-                "discount_type": row[6],
-                "discount_value": float(row[7]) if row[7] else 0,
-                "min_purchase_amount": float(row[8]) if row[8] else 0,
-                "max_discount": float(row[9]) if row[9] else None,
-                "is_selected": str(row[0]) in selected_ids,
+                "id": str(cid),
+                "type": ctype,
+                "discount_details": details,
+                "category_or_brand": cat_or_brand,
+                "expiration_date": expires,
+                "terms": terms,
+                "discount_type": dtype,
+                "discount_value": dvalue,
+                "min_purchase_amount": min_amount,
+                "max_discount": max_disc or None,
+                "is_selected": is_selected,
             }
 
-            is_eligible = False
-            reason = None
-
-            # Check eligibility based on type
-            if row[1] == "frontstore":
-                # Frontstore: check minimum purchase amount
-                min_amount = Decimal(str(row[8])) if row[8] else Decimal("0")
-                if cart_subtotal >= min_amount:
-                    is_eligible = True
-                else:
-                    reason = f"Minimum purchase ${min_amount:.2f} required"
-
-            elif row[1] == "category":
-                # Category: check if cart contains matching category
-                cat_or_brand = (row[3] or "").lower()
-                if cat_or_brand in cart_categories:
-                    is_eligible = True
-                else:
-                    reason = f"No {row[3]} products in cart"
-
-            elif row[1] == "brand":
-                # Brand: check if cart contains matching brand
-                cat_or_brand = (row[3] or "").lower()
-                if cat_or_brand in cart_brands:
-                    is_eligible = True
-                else:
-                    reason = f"No {row[3]} products in cart"
-
             if is_eligible:
                 eligible.append(coupon)
-            else:
-                coupon["ineligible_reason"] = reason
-                ineligible.append(coupon)
+                continue
+
+            reason = None
+            if ctype == "frontstore":
+                reason = f"Minimum purchase ${min_amount:.2f} required"
+            elif ctype in ("category", "brand"):
+                reason = f"No {cat_or_brand} products in cart"
+            coupon["ineligible_reason"] = reason
+            ineligible.append(coupon)
 
         logger.info(
             f"User {user_id}: {len(eligible)} eligible, {len(ineligible)} ineligible coupons"
         )
-        return JSONResponse(
+        return ORJSONResponse(
             {
                 "eligible": eligible,
                 "ineligible": ineligible,
-                "cart_subtotal": float(cart_subtotal),
+                "cart_subtotal": cart_subtotal,
             },
             status_code=200,
         )
@@ -1064,30 +1053,23 @@ async def add_coupon_to_cart(
     request: AddCouponRequest,
     http_request: Request,
     user: Dict[str, Any] = Depends(token_dep),
-    db: Session = Depends(db_dep),
-) -> JSONResponse:
+    db: AsyncSession = Depends(get_async_db),
+) -> ORJSONResponse:
     """
     B-15: Add coupon to cart (user selection).
     Returns: { "success": true, "coupon": {...} }
     """
     user_id = user["user_id"]
     coupon_id = request.coupon_id
+    validate_uuid(coupon_id, "coupon")
 
     # Performance timing
     t_start = time.time()
 
     try:
         # Verify coupon exists and is assigned to user
-        result = db.execute(
-            text("""
-                SELECT c.id, c.type, c.discount_details, c.category_or_brand
-                FROM coupons c
-                JOIN user_coupons uc ON c.id = uc.coupon_id
-                WHERE c.id = :coupon_id
-                  AND uc.user_id = :user_id
-                  AND uc.eligible_until > NOW()
-                  AND c.expiration_date > NOW()
-            """),
+        result = await db.execute(
+            ASSIGNED_COUPON_SQL,
             {"coupon_id": coupon_id, "user_id": user_id},
         )
         coupon_row = result.fetchone()
@@ -1098,34 +1080,15 @@ async def add_coupon_to_cart(
                 detail="Coupon not found or not assigned to you",
             )
 
-        # Add to cart_coupons
-        db.execute(
-            text("""
-                INSERT INTO cart_coupons (user_id, coupon_id)
-                VALUES (:user_id, :coupon_id)
-                ON CONFLICT (user_id, coupon_id) DO NOTHING
-            """),
-            {"user_id": user_id, "coupon_id": coupon_id},
-        )
-
-        # Track interaction
-        db.execute(
-            text("""
-                INSERT INTO coupon_interactions (user_id, coupon_id, action)
-                VALUES (:user_id, :coupon_id, 'added_to_cart')
-            """),
+        # Add to cart_coupons and track the interaction
+        await db.execute(
+            ADD_CART_COUPON_SQL,
             {"user_id": user_id, "coupon_id": coupon_id},
         )
 
         session_id = get_shopping_session_id(http_request)
         if session_id:
-            touch_shopping_session(
-                db,
-                session_id=session_id,
-                user_id=user_id,
-                store_id=_get_selected_store_id_for_session(db, user_id),
-            )
-            record_shopping_event(
+            await track_shopping_event_async(
                 db,
                 session_id=session_id,
                 user_id=user_id,
@@ -1133,7 +1096,7 @@ async def add_coupon_to_cart(
                 payload={"coupon_id": coupon_id},
             )
 
-        db.commit()
+        await db.commit()
 
         # Performance timing
         t_commit = time.time()
@@ -1146,9 +1109,9 @@ async def add_coupon_to_cart(
         }
 
         # Calculate updated cart data in same request
-        store_id = get_user_store_id(db, user_id)
+        store_id = await get_user_store_id_async(db, user_id)
         cart_data = (
-            _calculate_cart_data_for_response(db, user_id, store_id)
+            await _calculate_cart_data_for_response(db, user_id, store_id)
             if store_id
             else {
                 "summary": {
@@ -1175,7 +1138,7 @@ async def add_coupon_to_cart(
             f"calc:{t_calc - t_commit:.3f}s "
             f"total:{t_total - t_start:.3f}s"
         )
-        return JSONResponse(
+        return ORJSONResponse(
             {
                 "success": True,
                 "coupon": coupon,
@@ -1190,7 +1153,7 @@ async def add_coupon_to_cart(
         raise
     except Exception as e:
         logger.exception(f"Failed to add coupon to cart for user {user_id}: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to add coupon to cart: {str(e)}",
@@ -1202,43 +1165,28 @@ async def remove_coupon_from_cart(
     coupon_id: str,
     http_request: Request,
     user: Dict[str, Any] = Depends(token_dep),
-    db: Session = Depends(db_dep),
-) -> JSONResponse:
+    db: AsyncSession = Depends(get_async_db),
+) -> ORJSONResponse:
     """
     B-16: Remove coupon from cart.
     Returns: { "success": true }
     """
     user_id = user["user_id"]
+    validate_uuid(coupon_id, "coupon")
 
     # Performance timing
     t_start = time.time()
 
     try:
-        # Track interaction
-        db.execute(
-            text("""
-                INSERT INTO coupon_interactions (user_id, coupon_id, action)
-                VALUES (:user_id, :coupon_id, 'removed_from_cart')
-            """),
-            {"user_id": user_id, "coupon_id": coupon_id},
-        )
-
-        db.execute(
-            text(
-                "DELETE FROM cart_coupons WHERE user_id = :user_id AND coupon_id = :coupon_id"
-            ),
+        # Remove from cart_coupons and track the interaction
+        await db.execute(
+            REMOVE_CART_COUPON_SQL,
             {"user_id": user_id, "coupon_id": coupon_id},
         )
 
         session_id = get_shopping_session_id(http_request)
         if session_id:
-            touch_shopping_session(
-                db,
-                session_id=session_id,
-                user_id=user_id,
-                store_id=_get_selected_store_id_for_session(db, user_id),
-            )
-            record_shopping_event(
+            await track_shopping_event_async(
                 db,
                 session_id=session_id,
                 user_id=user_id,
@@ -1246,15 +1194,15 @@ async def remove_coupon_from_cart(
                 payload={"coupon_id": coupon_id},
             )
 
-        db.commit()
+        await db.commit()
 
         # Performance timing
         t_commit = time.time()
 
         # Calculate updated cart data in same request
-        store_id = get_user_store_id(db, user_id)
+        store_id = await get_user_store_id_async(db, user_id)
         cart_data = (
-            _calculate_cart_data_for_response(db, user_id, store_id)
+            await _calculate_cart_data_for_response(db, user_id, store_id)
             if store_id
             else {
                 "summary": {
@@ -1282,7 +1230,7 @@ async def remove_coupon_from_cart(
             f"total:{t_total - t_start:.3f}s"
         )
 
-        return JSONResponse(
+        return ORJSONResponse(
             {
                 "success": True,
                 "summary": cart_data["summary"],
@@ -1294,7 +1242,7 @@ async def remove_coupon_from_cart(
 
     except Exception as e:
         logger.exception(f"Failed to remove coupon from cart for user {user_id}: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to remove coupon from cart: {str(e)}",
@@ -1303,8 +1251,8 @@ async def remove_coupon_from_cart(
 
 @router.get("/cart/summary")
 async def get_cart_summary(
-    user: Dict[str, Any] = Depends(token_dep), db: Session = Depends(db_dep)
-) -> JSONResponse:
+    user: Dict[str, Any] = Depends(token_dep), db: AsyncSession = Depends(get_async_db)
+) -> ORJSONResponse:
     """
     B-17: Calculate cart totals with coupon stacking logic (B-22).
 
@@ -1326,9 +1274,9 @@ async def get_cart_summary(
     user_id = user["user_id"]
 
     try:
-        store_id = get_user_store_id(db, user_id)
+        store_id = await get_user_store_id_async(db, user_id)
         if not store_id:
-            return JSONResponse(
+            return ORJSONResponse(
                 {
                     "subtotal": 0,
                     "item_discounts": [],
@@ -1342,26 +1290,14 @@ async def get_cart_summary(
             )
 
         # Get cart items
-        items_result = db.execute(
-            text("""
-                SELECT
-                    ci.id as cart_item_id,
-                    ci.quantity,
-                    p.id as product_id,
-                    p.name,
-                    p.price,
-                    p.category,
-                    p.brand
-                FROM cart_items ci
-                JOIN products p ON ci.product_id = p.id
-                WHERE ci.user_id = :user_id AND ci.store_id = :store_id
-            """),
+        items_result = await db.execute(
+            CART_SUMMARY_ITEMS_SQL,
             {"user_id": user_id, "store_id": store_id},
         )
         items = items_result.fetchall()
 
         if not items:
-            return JSONResponse(
+            return ORJSONResponse(
                 {
                     "subtotal": 0,
                     "item_discounts": [],
@@ -1375,21 +1311,8 @@ async def get_cart_summary(
             )
 
         # Get selected coupons
-        coupons_result = db.execute(
-            text("""
-                SELECT
-                    c.id,
-                    c.type,
-                    c.discount_details,
-                    c.category_or_brand,
-                    c.discount_type,
-                    c.discount_value,
-                    c.min_purchase_amount,
-                    c.max_discount
-                FROM cart_coupons cc
-                JOIN coupons c ON cc.coupon_id = c.id
-                WHERE cc.user_id = :user_id
-            """),
+        coupons_result = await db.execute(
+            SELECTED_COUPONS_SQL,
             {"user_id": user_id},
         )
         coupons = coupons_result.fetchall()
@@ -1522,7 +1445,7 @@ async def get_cart_summary(
             f"User {user_id} cart summary: subtotal=${subtotal}, discounts=${discount_total}, final=${final_total}"
         )
 
-        return JSONResponse(
+        return ORJSONResponse(
             {
                 "subtotal": float(subtotal),
                 "item_discounts": item_discounts,
@@ -1546,8 +1469,8 @@ async def get_cart_summary(
 async def track_coupon_interaction(
     request: CouponInteractionRequest,
     user: Dict[str, Any] = Depends(token_dep),
-    db: Session = Depends(db_dep),
-) -> JSONResponse:
+    db: AsyncSession = Depends(get_async_db),
+) -> ORJSONResponse:
     """
     B-21: Track coupon interaction.
     Actions: 'added_to_cart', 'removed_from_cart', 'applied', 'redeemed'
@@ -1561,13 +1484,11 @@ async def track_coupon_interaction(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid action. Must be one of: {', '.join(valid_actions)}",
         )
+    validate_uuid(request.coupon_id, "coupon")
 
     try:
-        db.execute(
-            text("""
-                INSERT INTO coupon_interactions (user_id, coupon_id, action, order_id)
-                VALUES (:user_id, :coupon_id, :action, :order_id)
-            """),
+        await db.execute(
+            INSERT_COUPON_INTERACTION_SQL,
             {
                 "user_id": user_id,
                 "coupon_id": request.coupon_id,
@@ -1575,16 +1496,16 @@ async def track_coupon_interaction(
                 "order_id": request.order_id,
             },
         )
-        db.commit()
+        await db.commit()
 
         logger.info(
             f"User {user_id} interaction: {request.action} on coupon {request.coupon_id}"
         )
-        return JSONResponse({"success": True}, status_code=200)
+        return ORJSONResponse({"success": True}, status_code=200)
 
     except Exception as e:
         logger.exception(f"Failed to track coupon interaction for user {user_id}: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to track interaction: {str(e)}",
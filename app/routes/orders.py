@@ -7,11 +7,10 @@ B-20: GET /api/orders/{order_id} - Get order details with items and applied coup
 """
 
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List
 from decimal import Decimal
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Request
-from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
@@ -19,13 +18,13 @@ logger = logging.getLogger("multi_modal_retail.orders")
 
 router = APIRouter(prefix="/api", tags=["orders"])
 
+from app.responses import ORJSONResponse
 from app.session_tracking import (
-    get_selected_store_id as _get_selected_store_id_for_session,
     get_shopping_session_id,
-    touch_shopping_session,
-    record_shopping_event,
+    track_shopping_event,
     complete_shopping_session,
 )
+from app.store_cache import get_user_store_id
 
 # --- Dependencies (imported from main) ---
 
@@ -56,16 +55,6 @@ def token_dep(authorization: str = Header(None)) -> Dict[str, Any]:
 
 # --- Helper Functions ---
 
-def get_user_store_id(db: Session, user_id: str) -> Optional[str]:
-    """Get user's selected store ID."""
-    result = db.execute(
-        text("SELECT selected_store_id FROM user_preferences WHERE user_id = :user_id"),
-        {"user_id": user_id}
-    )
-    row = result.fetchone()
-    return str(row[0]) if row and row[0] else None
-
-
 def calculate_discount(coupon: Dict, amount: Decimal) -> Decimal:
     """Calculate discount amount based on coupon type."""
     discount_type = coupon.get("discount_type")
@@ -93,7 +82,7 @@ async def create_order(
     http_request: Request,
     user: Dict[str, Any] = Depends(token_dep),
     db: Session = Depends(db_dep)
-) -> JSONResponse:
+) -> ORJSONResponse:
     """
     B-18: Create order (checkout).
     - Validates inventory
@@ -338,13 +327,7 @@ async def create_order(
 
         # Session event tracking + completion
         if session_id:
-            touch_shopping_session(
-                db,
-                session_id=session_id,
-                user_id=user_id,
-                store_id=_get_selected_store_id_for_session(db, user_id),
-            )
-            record_shopping_event(
+            track_shopping_event(
                 db,
                 session_id=session_id,
                 user_id=user_id,
@@ -443,7 +426,7 @@ async def create_order(
 
         logger.info(f"User {user_id} completed order {order_id}: ${final_total:.2f}")
 
-        return JSONResponse({
+        return ORJSONResponse({
             "success": True,
             "order": {
                 "id": order_id,
@@ -483,7 +466,7 @@ async def get_orders(
     offset: int = Query(0, ge=0),
     user: Dict[str, Any] = Depends(token_dep),
     db: Session = Depends(db_dep)
-) -> JSONResponse:
+) -> ORJSONResponse:
     """
     B-19: Get user's order history.
     Returns: { "orders": [...], "total": int }
@@ -535,7 +518,7 @@ async def get_orders(
             })
 
         logger.info(f"User {user_id} fetched {len(orders)} orders")
-        return JSONResponse({
+        return ORJSONResponse({
             "orders": orders,
             "total": total
         }, status_code=200)
@@ -553,7 +536,7 @@ async def get_order_detail(
     order_id: str,
     user: Dict[str, Any] = Depends(token_dep),
     db: Session = Depends(db_dep)
-) -> JSONResponse:
+) -> ORJSONResponse:
     """
     B-20: Get order details with items and applied coupons (receipt view).
     Returns: { "order": { id, store, items, coupons, totals, ... } }
@@ -685,7 +668,7 @@ async def get_order_detail(
         }
 
         logger.info(f"User {user_id} fetched order details for {order_id}")
-        return JSONResponse({"order": order}, status_code=200)
+        return ORJSONResponse({"order": order}, status_code=200)
 
     except HTTPException:
         raise
@@ -8,17 +8,26 @@ B-4: GET /api/user/store - Get user's selected store
 """
 
 import logging
+import os
+import time
 from typing import Dict, Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Header
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from pydantic import BaseModel
 
+from app.pg_pool import get_async_db
+from app.responses import ORJSONResponse
+from app.store_cache import invalidate_user_store_id
+
 logger = logging.getLogger("multi_modal_retail.stores")
 
 router = APIRouter(prefix="/api", tags=["stores"])
 
+# Store list changes rarely; serve it from memory for this many seconds
+STORES_CACHE_TTL = float(os.getenv("STORES_CACHE_TTL", "60"))
+_stores_cache: Dict[str, Any] = {"ts": 0.0, "stores": None}
+
 
 # --- Pydantic Models ---
 
@@ -58,33 +67,37 @@ def token_dep(authorization: str = Header(None)) -> Dict[str, Any]:
 
 @router.get("/stores")
 async def list_stores(
-    db: Session = Depends(db_dep)
-) -> JSONResponse:
+    db: AsyncSession = Depends(get_async_db)
+) -> ORJSONResponse:
     """
     B-1: List all available stores.
     Returns: { "stores": [{ id, name, created_at }] }
     """
     try:
-        result = db.execute(
-            text("""
-                SELECT id, name, created_at
-                FROM stores
-                ORDER BY name ASC
-            """)
-        )
-        rows = result.fetchall()
-
-        stores = [
-            {
-                "id": str(row[0]),
-                "name": row[1],
-                "created_at": row[2].isoformat() if row[2] else None
-            }
-            for row in rows
-        ]
+        stores = _stores_cache["stores"]
+        if stores is None or time.monotonic() - _stores_cache["ts"] >= STORES_CACHE_TTL:
+            result = await db.execute(
+                text("""
+                    SELECT id, name, created_at
+                    FROM stores
+                    ORDER BY name ASC
+                """)
+            )
+            rows = result.fetchall()
+
+            stores = [
+                {
+                    "id": str(row[0]),
+                    "name": row[1],
+                    "created_at": row[2].isoformat() if row[2] else None
+                }
+                for row in rows
+            ]
+            _stores_cache["stores"] = stores
+            _stores_cache["ts"] = time.monotonic()
 
         logger.info(f"Returning {len(stores)} stores")
-        return JSONResponse({"stores": stores, "count": len(stores)}, status_code=200)
+        return ORJSONResponse({"stores": stores, "count": len(stores)}, status_code=200)
 
     except Exception as e:
         logger.exception(f"Failed to list stores: {e}")
@@ -97,15 +110,15 @@ async def list_stores(
 @router.get("/stores/{store_id}")
 async def get_store(
     store_id: str,
-    db: Session = Depends(db_dep)
-) -> JSONResponse:
+    db: AsyncSession = Depends(get_async_db)
+) -> ORJSONResponse:
     """
     B-2: Get single store with inventory summary.
     Returns: { "store": { id, name, created_at, inventory_summary: { total_products, total_quantity } } }
     """
     try:
         # Get store details
-        result = db.execute(
+        result = await db.execute(
             text("""
                 SELECT id, name, created_at
                 FROM stores
@@ -122,7 +135,7 @@ async def get_store(
             )
 
         # Get inventory summary
-        inventory_result = db.execute(
+        inventory_result = await db.execute(
             text("""
                 SELECT
                     COUNT(DISTINCT product_id) as total_products,
@@ -145,7 +158,7 @@ async def get_store(
         }
 
         logger.info(f"Returning store: {store['name']}")
-        return JSONResponse({"store": store}, status_code=200)
+        return ORJSONResponse({"store": store}, status_code=200)
 
     except HTTPException:
         raise
@@ -160,8 +173,8 @@ async def get_store(
 @router.get("/user/store")
 async def get_user_store(
     user: Dict[str, Any] = Depends(token_dep),
-    db: Session = Depends(db_dep)
-) -> JSONResponse:
+    db: AsyncSession = Depends(get_async_db)
+) -> ORJSONResponse:
     """
     B-4: Get user's selected store.
     Returns: { "store": { id, name } | null, "has_selection": bool }
@@ -169,7 +182,7 @@ async def get_user_store(
     user_id = user["user_id"]
 
     try:
-        result = db.execute(
+        result = await db.execute(
             text("""
                 SELECT s.id, s.name
                 FROM user_preferences up
@@ -183,13 +196,13 @@ async def get_user_store(
         if row:
             store = {"id": str(row[0]), "name": row[1]}
             logger.info(f"User {user_id} has selected store: {store['name']}")
-            return JSONResponse({
+            return ORJSONResponse({
                 "store": store,
                 "has_selection": True
             }, status_code=200)
         else:
             logger.info(f"User {user_id} has no store selected")
-            return JSONResponse({
+            return ORJSONResponse({
                 "store": None,
                 "has_selection": False
             }, status_code=200)
@@ -206,8 +219,8 @@ async def get_user_store(
 async def set_user_store(
     request: SetStoreRequest,
     user: Dict[str, Any] = Depends(token_dep),
-    db: Session = Depends(db_dep)
-) -> JSONResponse:
+    db: AsyncSession = Depends(get_async_db)
+) -> ORJSONResponse:
     """
     B-3: Set user's selected store.
     Also clears user's cart when store changes (cart is store-specific).
@@ -218,7 +231,7 @@ async def set_user_store(
 
     try:
         # Verify store exists
-        store_result = db.execute(
+        store_result = await db.execute(
             text("SELECT id, name FROM stores WHERE id = :store_id"),
             {"store_id": store_id}
         )
@@ -231,7 +244,7 @@ async def set_user_store(
             )
 
         # Check if user has existing store selection
-        existing_result = db.execute(
+        existing_result = await db.execute(
             text("SELECT selected_store_id FROM user_preferences WHERE user_id = :user_id"),
             {"user_id": user_id}
         )
@@ -242,11 +255,11 @@ async def set_user_store(
 
         # If changing stores, clear the cart
         if old_store_id and str(old_store_id) != store_id:
-            db.execute(
+            await db.execute(
                 text("DELETE FROM cart_items WHERE user_id = :user_id"),
                 {"user_id": user_id}
             )
-            db.execute(
+            await db.execute(
                 text("DELETE FROM cart_coupons WHERE user_id = :user_id"),
                 {"user_id": user_id}
             )
@@ -254,7 +267,7 @@ async def set_user_store(
             logger.info(f"Cleared cart for user {user_id} due to store change")
 
         # Upsert user preference
-        db.execute(
+        await db.execute(
             text("""
                 INSERT INTO user_preferences (user_id, selected_store_id, updated_at)
                 VALUES (:user_id, :store_id, CURRENT_TIMESTAMP)
@@ -265,12 +278,13 @@ async def set_user_store(
             """),
             {"user_id": user_id, "store_id": store_id}
         )
-        db.commit()
+        await db.commit()
+        await invalidate_user_store_id(user_id)
 
         store = {"id": str(store_row[0]), "name": store_row[1]}
         logger.info(f"User {user_id} selected store: {store['name']}")
 
-        return JSONResponse({
+        return ORJSONResponse({
             "success": True,
             "store": store,
             "cart_cleared": cart_cleared
@@ -280,7 +294,7 @@ async def set_user_store(
         raise
     except Exception as e:
         logger.exception(f"Failed to set user store for {user_id}: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to set user store: {str(e)}"
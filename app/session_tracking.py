@@ -1,22 +1,20 @@
-import json
 from typing import Any, Dict, Optional
 from uuid import UUID
 
+import orjson
 from fastapi import HTTPException, Request
 from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.store_cache import get_user_store_id
+
 
 SHOPPING_SESSION_HEADER = "X-Shopping-Session-Id"
 
 
 def get_selected_store_id(db: Session, user_id: str) -> Optional[str]:
-    result = db.execute(
-        text("SELECT selected_store_id FROM user_preferences WHERE user_id = :user_id"),
-        {"user_id": user_id},
-    )
-    row = result.fetchone()
-    return str(row[0]) if row and row[0] else None
+    return get_user_store_id(db, user_id)
 
 
 def get_shopping_session_id(request: Request) -> Optional[str]:
@@ -65,7 +63,7 @@ def record_shopping_event(
     event_type: str,
     payload: Optional[Dict[str, Any]] = None,
 ) -> None:
-    payload_json = json.dumps(payload or {})
+    payload_json = orjson.dumps(payload or {}).decode()
     db.execute(
         text(
             """
@@ -82,6 +80,88 @@ def record_shopping_event(
     )
 
 
+# touch_shopping_session + record_shopping_event in one statement; the store
+# comes from the user's preferences and the event is only written when the
+# session belongs to the user
+TRACK_SHOPPING_EVENT_SQL = text(
+    """
+    WITH sess AS (
+        INSERT INTO shopping_sessions (id, user_id, store_id, status, started_at, last_seen_at)
+        VALUES (
+            :session_id,
+            :user_id,
+            (SELECT selected_store_id FROM user_preferences WHERE user_id = :user_id),
+            'active',
+            CURRENT_TIMESTAMP,
+            CURRENT_TIMESTAMP
+        )
+        ON CONFLICT (id) DO UPDATE SET
+            last_seen_at = CURRENT_TIMESTAMP,
+            store_id = COALESCE(EXCLUDED.store_id, shopping_sessions.store_id)
+        RETURNING user_id
+    ),
+    event AS (
+        INSERT INTO shopping_session_events (session_id, user_id, event_type, payload)
+        SELECT :session_id, :user_id, :event_type, cast(:payload as jsonb)
+        FROM sess
+        WHERE sess.user_id = :user_id
+    )
+    SELECT user_id FROM sess
+    """
+)
+
+
+def track_shopping_event(
+    db: Session,
+    *,
+    session_id: str,
+    user_id: str,
+    event_type: str,
+    payload: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Touch the session and record an event in one round trip.
+
+    Same effect as touch_shopping_session (with the user's selected store)
+    followed by record_shopping_event.
+    """
+    result = db.execute(
+        TRACK_SHOPPING_EVENT_SQL,
+        {
+            "session_id": session_id,
+            "user_id": user_id,
+            "event_type": event_type,
+            "payload": orjson.dumps(payload or {}).decode(),
+        },
+    )
+    existing_user_id = result.scalar()
+    if existing_user_id and str(existing_user_id) != str(user_id):
+        raise HTTPException(status_code=403, detail="Shopping session does not belong to this user")
+
+
+async def track_shopping_event_async(
+    db: AsyncSession,
+    *,
+    session_id: str,
+    user_id: str,
+    event_type: str,
+    payload: Optional[Dict[str, Any]] = None,
+) -> None:
+    """track_shopping_event for handlers on an AsyncSession."""
+    result = await db.execute(
+        TRACK_SHOPPING_EVENT_SQL,
+        {
+            "session_id": session_id,
+            "user_id": user_id,
+            "event_type": event_type,
+            "payload": orjson.dumps(payload or {}).decode(),
+        },
+    )
+    existing_user_id = result.scalar()
+    if existing_user_id and str(existing_user_id) != str(user_id):
+        raise HTTPException(status_code=403, detail="Shopping session does not belong to this user")
+
+
 def complete_shopping_session(db: Session, *, session_id: str, user_id: str) -> None:
     db.execute(
         text(
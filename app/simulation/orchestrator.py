@@ -34,7 +34,12 @@ from rich.layout import Layout
 from rich.text import Text
 from rich.logging import RichHandler
 
-from app.offer_engine import get_scheduler, get_config, reset_singletons
+from app.offer_engine import (
+    get_scheduler,
+    get_config,
+    invalidate_cycle_cache,
+    reset_singletons,
+)
 from app.simulation.agent.state import AgentState, create_initial_state
 from app.simulation.agent.actions import set_actions, get_actions
 from app.simulation.agent.shopping_graph import get_shopping_graph
@@ -507,7 +512,7 @@ class SimulationOrchestrator:
         logger.info(f"Simulation active check: {is_active}")
         logger.info(f"  simulation_mode: {self.scheduler.config.simulation_mode}")
         logger.info(
-            f"  time_service._is_active: {self.scheduler.time_service._is_active}"
+            f"  time_service clock active: {self.scheduler.time_service._clock.is_active}"
         )
         logger.info(f"  requested start_date: {start_date}")
 
@@ -552,6 +557,7 @@ class SimulationOrchestrator:
                 cycles_deleted = result.rowcount
 
                 self.db.commit()
+                invalidate_cycle_cache()
                 logger.info(
                     f"Cleared simulation data: {expired_count} offers expired, "
                     f"{cycles_cleared} cycles removed, {cycles_deleted} user cycle records deleted"
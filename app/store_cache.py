@@ -0,0 +1,235 @@
+"""
+Cache-aside lookup of a user's selected store, backed by Redis.
+
+Cart, coupon and order endpoints all need the user's store before doing
+anything else, and it only changes when the user picks a different store.
+With REDIS_URL set the value is kept under "u:<user_id>:store" for
+STORE_ID_TTL_SECONDS; the store-selection endpoint invalidates it. Without
+REDIS_URL (or when Redis is unreachable) every lookup goes to Postgres.
+
+Each worker also remembers stores it has seen for LOCAL_TTL_SECONDS, so
+repeated lookups within a burst of requests skip Redis too. Invalidations
+are published on INVALIDATION_CHANNEL and every worker drops its copy when
+the message arrives; the local cache is only used while this worker is
+subscribed, so without Redis no worker can serve a stale selection.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+STORE_ID_TTL_SECONDS = 300
+LOCAL_TTL_SECONDS = 5.0
+LOCAL_CACHE_MAX_USERS = 50000
+INVALIDATION_CHANNEL = "store_cache:invalidate"
+# Seconds to wait before subscribing again after a failed attempt
+_RESUBSCRIBE_AFTER_SECONDS = 60.0
+
+SELECTED_STORE_SQL = text(
+    "SELECT selected_store_id FROM user_preferences WHERE user_id = :user_id"
+)
+
+_redis = None
+_async_redis = None
+# user_id -> (expires_at monotonic, store_id)
+_local_cache: Dict[str, Tuple[float, str]] = {}
+# Set while this worker receives invalidations; gates the local cache
+_listening = False
+_listener_task: Optional[asyncio.Task] = None
+_subscribe_failed_at: Optional[float] = None
+_subscribe_lock = asyncio.Lock()
+
+
+def _get_redis():
+    """Create the Redis client on first use (None when REDIS_URL is unset)."""
+    global _redis
+    if _redis is None:
+        redis_url = os.getenv("REDIS_URL")
+        if not redis_url:
+            return None
+        import redis
+
+        _redis = redis.Redis.from_url(
+            redis_url, socket_timeout=0.25, socket_connect_timeout=0.25
+        )
+    return _redis
+
+
+def _get_async_redis():
+    """Create the asyncio Redis client on first use (None when REDIS_URL is unset)."""
+    global _async_redis
+    if _async_redis is None:
+        redis_url = os.getenv("REDIS_URL")
+        if not redis_url:
+            return None
+        import redis.asyncio as aioredis
+
+        _async_redis = aioredis.from_url(
+            redis_url, socket_timeout=0.25, socket_connect_timeout=0.25
+        )
+    return _async_redis
+
+
+def _key(user_id: str) -> str:
+    return f"u:{user_id}:store"
+
+
+def _local_get(user_id: str) -> Optional[str]:
+    if not _listening:
+        return None
+    entry = _local_cache.get(user_id)
+    if entry is not None and time.monotonic() < entry[0]:
+        return entry[1]
+    return None
+
+
+def _local_put(user_id: str, store_id: str) -> None:
+    """Remember a store in this worker (cache is dropped wholesale when full)."""
+    if not _listening:
+        return
+    if len(_local_cache) >= LOCAL_CACHE_MAX_USERS:
+        _local_cache.clear()
+    _local_cache[user_id] = (time.monotonic() + LOCAL_TTL_SECONDS, store_id)
+
+
+async def _listen(pubsub) -> None:
+    """Drop local entries named on INVALIDATION_CHANNEL until the connection fails."""
+    global _listening, _listener_task
+    try:
+        async for message in pubsub.listen():
+            if message["type"] == "subscribe":
+                _listening = True
+            elif message["type"] == "message":
+                _local_cache.pop(message["data"].decode(), None)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.warning(f"Store cache invalidation listener stopped: {e}")
+    finally:
+        # Missed invalidations are possible from here on; stop trusting copies
+        _listening = False
+        _local_cache.clear()
+        _listener_task = None
+        try:
+            await pubsub.close()
+        except Exception:
+            pass
+
+
+async def _ensure_listener() -> None:
+    """Subscribe this worker to invalidations (once; retried after failures)."""
+    global _listener_task, _subscribe_failed_at
+    if _listener_task is not None:
+        return
+    if (
+        _subscribe_failed_at
+        and time.monotonic() - _subscribe_failed_at < _RESUBSCRIBE_AFTER_SECONDS
+    ):
+        return
+    redis_url = os.getenv("REDIS_URL")
+    if not redis_url:
+        return
+
+    async with _subscribe_lock:
+        if _listener_task is not None:
+            return
+        import redis.asyncio as aioredis
+
+        # Own connection without a read timeout: the subscription sits idle
+        pubsub = aioredis.from_url(redis_url, socket_connect_timeout=0.25).pubsub()
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+        except Exception as e:
+            _subscribe_failed_at = time.monotonic()
+            logger.warning(f"Store cache invalidation subscribe failed: {e}")
+            return
+        _subscribe_failed_at = None
+        _listener_task = asyncio.create_task(_listen(pubsub))
+
+
+def get_user_store_id(db: Session, user_id: str) -> Optional[str]:
+    """Get user's selected store ID, from the local or Redis cache when present."""
+    store_id = _local_get(user_id)
+    if store_id:
+        return store_id
+
+    client = _get_redis()
+    if client is not None:
+        try:
+            cached = client.get(_key(user_id))
+            if cached:
+                store_id = cached.decode()
+                _local_put(user_id, store_id)
+                return store_id
+        except Exception as e:
+            logger.warning(f"Redis store lookup failed, using database: {e}")
+            client = None
+
+    row = db.execute(SELECTED_STORE_SQL, {"user_id": user_id}).fetchone()
+    store_id = str(row[0]) if row and row[0] else None
+
+    # Only a selected store is cached, so a first selection is seen immediately
+    if store_id:
+        _local_put(user_id, store_id)
+    if store_id and client is not None:
+        try:
+            client.setex(_key(user_id), STORE_ID_TTL_SECONDS, store_id)
+        except Exception as e:
+            logger.warning(f"Redis store cache write failed: {e}")
+    return store_id
+
+
+async def get_user_store_id_async(db: AsyncSession, user_id: str) -> Optional[str]:
+    """get_user_store_id for handlers on an AsyncSession."""
+    await _ensure_listener()
+    store_id = _local_get(user_id)
+    if store_id:
+        return store_id
+
+    client = _get_async_redis()
+    if client is not None:
+        try:
+            cached = await client.get(_key(user_id))
+            if cached:
+                store_id = cached.decode()
+                _local_put(user_id, store_id)
+                return store_id
+        except Exception as e:
+            logger.warning(f"Redis store lookup failed, using database: {e}")
+            client = None
+
+    result = await db.execute(SELECTED_STORE_SQL, {"user_id": user_id})
+    row = result.fetchone()
+    store_id = str(row[0]) if row and row[0] else None
+
+    if store_id:
+        _local_put(user_id, store_id)
+    if store_id and client is not None:
+        try:
+            await client.setex(_key(user_id), STORE_ID_TTL_SECONDS, store_id)
+        except Exception as e:
+            logger.warning(f"Redis store cache write failed: {e}")
+    return store_id
+
+
+async def invalidate_user_store_id(user_id: str) -> None:
+    """Drop the cached store for a user, in Redis and every worker, after a change."""
+    _local_cache.pop(user_id, None)
+    client = _get_async_redis()
+    if client is None:
+        return
+    try:
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.delete(_key(user_id))
+            pipe.publish(INVALIDATION_CHANNEL, user_id)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Redis store cache invalidation failed for {user_id}: {e}")
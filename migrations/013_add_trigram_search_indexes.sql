@@ -0,0 +1,59 @@
+-- ============================================================================
+-- Migration 013: Trigram Indexes for ILIKE Search Fallbacks
+-- When full-text search finds nothing, product and coupon search fall back to
+-- ILIKE '%term%' matching, which cannot use btree or tsvector indexes and
+-- scans every row. GIN trigram indexes let those predicates use index scans.
+-- ============================================================================
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Product search fallback
+-- Query pattern: WHERE in_stock = true AND (name ILIKE ? OR description ILIKE ?
+--                OR category ILIKE ? OR brand ILIKE ?)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_products_name_trgm
+ON products USING GIN (name gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_products_description_trgm
+ON products USING GIN (description gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_products_category_trgm
+ON products USING GIN (category gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_products_brand_trgm
+ON products USING GIN (brand gin_trgm_ops);
+
+-- Coupon search fallback
+-- Query pattern: WHERE discount_details ILIKE ? OR category_or_brand ILIKE ?
+--                OR terms ILIKE ?
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_coupons_discount_details_trgm
+ON coupons USING GIN (discount_details gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_coupons_category_or_brand_trgm
+ON coupons USING GIN (category_or_brand gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_coupons_terms_trgm
+ON coupons USING GIN (terms gin_trgm_ops);
+
+-- Verify indexes were created
+DO $$
+DECLARE
+    index_count INTEGER;
+BEGIN
+    SELECT COUNT(*) INTO index_count
+    FROM pg_indexes
+    WHERE indexname IN (
+        'idx_products_name_trgm',
+        'idx_products_description_trgm',
+        'idx_products_category_trgm',
+        'idx_products_brand_trgm',
+        'idx_coupons_discount_details_trgm',
+        'idx_coupons_category_or_brand_trgm',
+        'idx_coupons_terms_trgm'
+    );
+
+    IF index_count = 7 THEN
+        RAISE NOTICE '✓ All 7 indexes created successfully';
+    ELSE
+        RAISE NOTICE '✗ Only % out of 7 indexes created', index_count;
+    END IF;
+END $$;
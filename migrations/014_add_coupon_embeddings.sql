@@ -0,0 +1,33 @@
+-- ============================================================================
+-- Migration 014: Persistent Coupon Embedding Cache
+-- Coupon search re-ranks FTS candidates by embedding similarity. Coupons not
+-- in the prebuilt FAISS index were re-embedded by every worker after every
+-- restart; their normalized vectors are now stored here once per
+-- (coupon, model) and reused until the coupon text changes (text_hash).
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS coupon_embeddings (
+    coupon_id UUID NOT NULL REFERENCES coupons(id) ON DELETE CASCADE,
+    model TEXT NOT NULL,
+    -- sha256 of the embedded text; a mismatch means the coupon was edited
+    text_hash TEXT NOT NULL,
+    embedding REAL[] NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (coupon_id, model)
+);
+
+COMMENT ON TABLE coupon_embeddings IS 'L2-normalized coupon embeddings for coupons missing from the FAISS index';
+
+-- Verify table was created
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.tables
+        WHERE table_name = 'coupon_embeddings'
+    ) THEN
+        RAISE NOTICE '✓ coupon_embeddings table created successfully';
+    ELSE
+        RAISE EXCEPTION '✗ coupon_embeddings table was not created';
+    END IF;
+END $$;
@@ -0,0 +1,31 @@
+-- ============================================================================
+-- Migration 015: Store Coupon Embeddings as int8
+-- Replaces the REAL[] vectors from migration 014 with symmetric per-row int8
+-- quantization (one byte per dimension plus a REAL scale): 4x less storage
+-- and 4x less data per lookup, with negligible effect on re-ranking.
+-- The table is a cache, so existing rows are dropped and re-embedded lazily.
+-- ============================================================================
+
+DELETE FROM coupon_embeddings;
+
+ALTER TABLE coupon_embeddings DROP COLUMN IF EXISTS embedding;
+ALTER TABLE coupon_embeddings ADD COLUMN IF NOT EXISTS embedding_i8 BYTEA NOT NULL;
+ALTER TABLE coupon_embeddings ADD COLUMN IF NOT EXISTS embedding_scale REAL NOT NULL;
+
+COMMENT ON COLUMN coupon_embeddings.embedding_i8 IS 'int8 components of the normalized embedding (value = component * embedding_scale)';
+
+-- Verify columns were changed
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'coupon_embeddings' AND column_name = 'embedding_i8'
+    ) AND NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'coupon_embeddings' AND column_name = 'embedding'
+    ) THEN
+        RAISE NOTICE '✓ coupon_embeddings now stores int8 embeddings';
+    ELSE
+        RAISE EXCEPTION '✗ coupon_embeddings columns were not changed';
+    END IF;
+END $$;
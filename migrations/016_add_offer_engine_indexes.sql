@@ -0,0 +1,51 @@
+-- ============================================================================
+-- Migration 016: Performance Indexes for Offer Engine Queries
+-- The weekly refresh, expiration sweep and simulation stats filter
+-- user_coupons on is_simulation/status; without matching indexes each call
+-- scans every assignment rather than the user's own rows
+-- ============================================================================
+
+-- Index for per-user simulation expiry and stats
+-- Query pattern: WHERE user_id = ? AND status = 'active' AND is_simulation = true
+--                WHERE user_id = ? AND is_simulation = true GROUP BY status
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_coupons_sim_user_status
+ON user_coupons (user_id, status)
+WHERE is_simulation = true;
+
+-- Partial index for the global expiration sweep
+-- Query pattern: WHERE status = 'active' AND is_simulation = true AND eligible_until <= ?
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_coupons_sim_active_expiry
+ON user_coupons (eligible_until)
+WHERE is_simulation = true AND status = 'active';
+
+-- Index for the 28-day recent-assignment exclusion
+-- Query pattern: WHERE user_id = ? AND is_simulation = true AND assigned_at > ?
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_coupons_sim_user_assigned
+ON user_coupons (user_id, assigned_at DESC)
+WHERE is_simulation = true;
+
+-- Covering index for offer pool picks (index-only scan on type)
+-- Query pattern: SELECT id FROM coupons WHERE type = ? ORDER BY RANDOM() LIMIT ?
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_coupons_type_include_id
+ON coupons (type) INCLUDE (id);
+
+-- Verify indexes were created
+DO $$
+DECLARE
+    index_count INTEGER;
+BEGIN
+    SELECT COUNT(*) INTO index_count
+    FROM pg_indexes
+    WHERE indexname IN (
+        'idx_user_coupons_sim_user_status',
+        'idx_user_coupons_sim_active_expiry',
+        'idx_user_coupons_sim_user_assigned',
+        'idx_coupons_type_include_id'
+    );
+
+    IF index_count = 4 THEN
+        RAISE NOTICE '✓ All 4 indexes created successfully';
+    ELSE
+        RAISE NOTICE '✗ Only % out of 4 indexes created', index_count;
+    END IF;
+END $$;
@@ -0,0 +1,25 @@
+-- ============================================================================
+-- Migration 017: Partial Index for Simulated Shopping Sessions
+-- Simulation stats join shopping_session_events to the simulated sessions;
+-- the join side is idx_shopping_session_events_session_id (migration 006),
+-- this index lets the planner read only simulated session ids
+-- ============================================================================
+
+-- Partial index for the simulated-session side of the events join
+-- Query pattern: JOIN shopping_sessions s ON s.id = e.session_id AND s.is_simulated = true
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_shopping_sessions_simulated_id
+ON shopping_sessions (id)
+WHERE is_simulated = true;
+
+-- Verify index was created
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_indexes
+        WHERE indexname = 'idx_shopping_sessions_simulated_id'
+    ) THEN
+        RAISE NOTICE '✓ idx_shopping_sessions_simulated_id created successfully';
+    ELSE
+        RAISE NOTICE '✗ idx_shopping_sessions_simulated_id was not created';
+    END IF;
+END $$;
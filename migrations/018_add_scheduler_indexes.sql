@@ -0,0 +1,37 @@
+-- ============================================================================
+-- Migration 018: Partial Indexes for Scheduler User Discovery
+-- Every time advance looks up past-due simulation users and active agents;
+-- migration 007 only indexes these columns unconditionally
+-- ============================================================================
+
+-- Partial covering index for past-due simulation users
+-- Query pattern: WHERE is_simulation = true AND next_refresh_at <= ?  (selects user_id)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_offer_cycles_sim_next_refresh
+ON user_offer_cycles (next_refresh_at)
+INCLUDE (user_id)
+WHERE is_simulation = true;
+
+-- Partial index for active agent users
+-- Query pattern: FROM agents a WHERE a.is_active = true  (joins on a.user_id)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_agents_active_user_id
+ON agents (user_id)
+WHERE is_active = true;
+
+-- Verify indexes were created
+DO $$
+DECLARE
+    index_count INTEGER;
+BEGIN
+    SELECT COUNT(*) INTO index_count
+    FROM pg_indexes
+    WHERE indexname IN (
+        'idx_user_offer_cycles_sim_next_refresh',
+        'idx_agents_active_user_id'
+    );
+
+    IF index_count = 2 THEN
+        RAISE NOTICE '✓ All 2 indexes created successfully';
+    ELSE
+        RAISE NOTICE '✗ Only % out of 2 indexes created', index_count;
+    END IF;
+END $$;
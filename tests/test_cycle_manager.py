@@ -0,0 +1,41 @@
+"""Tests for the per-process next-refresh cache in the cycle manager."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.offer_engine import cycle_manager
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    cycle_manager.invalidate_cycle_cache()
+    yield
+    cycle_manager.invalidate_cycle_cache()
+
+
+class TestNextRefreshCache:
+    """Cached next_refresh_at values are only trusted for CYCLE_CACHE_TTL_SECONDS."""
+
+    def test_fresh_entry_is_served(self):
+        """Test a just-cached value is returned."""
+        due = datetime(2024, 1, 8)
+        cycle_manager._cache_next_refresh("u1", due)
+        assert cycle_manager._cached_next_refresh("u1") == due
+
+    def test_expired_entry_is_dropped(self, monkeypatch):
+        """Test an entry older than the TTL is ignored and evicted."""
+        cycle_manager._cache_next_refresh("u1", datetime(2024, 1, 8))
+        monkeypatch.setattr(cycle_manager, "CYCLE_CACHE_TTL_SECONDS", 0.0)
+
+        assert cycle_manager._cached_next_refresh("u1") is None
+        assert "u1" not in cycle_manager._next_refresh_cache
+
+    def test_full_cache_is_dropped(self, monkeypatch):
+        """Test the cache is cleared rather than growing past its bound."""
+        monkeypatch.setattr(cycle_manager, "NEXT_REFRESH_CACHE_MAX_USERS", 2)
+        start = datetime(2024, 1, 8)
+        for i in range(3):
+            cycle_manager._cache_next_refresh(f"u{i}", start + timedelta(days=i))
+
+        assert list(cycle_manager._next_refresh_cache) == ["u2"]
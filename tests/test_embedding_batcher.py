@@ -0,0 +1,224 @@
+"""Tests for embedding micro-batching, the embedding LRU and int8 quantization."""
+
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.embedding_batcher import (
+    EmbeddingBatcher,
+    EmbeddingCache,
+    dequantize_int8,
+    quantize_int8,
+)
+
+
+class _FakeEmbeddings:
+    """Stand-in for client.embeddings; the vector for "tN" is [N, N]."""
+
+    def __init__(self, error: Exception = None, delay: float = 0.0):
+        self.calls = []
+        self.timeouts = []
+        self.error = error
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, model, input, timeout=None):
+        self.calls.append((model, list(input)))
+        self.timeouts.append(timeout)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        if self.error is not None:
+            raise self.error
+        return SimpleNamespace(
+            data=[
+                SimpleNamespace(embedding=[float(t[1:])] * 2) for t in input
+            ]
+        )
+
+
+def _batcher(embeddings: _FakeEmbeddings, **kwargs) -> EmbeddingBatcher:
+    client = SimpleNamespace(embeddings=embeddings)
+    return EmbeddingBatcher(lambda: client, **kwargs)
+
+
+class TestEmbeddingBatcher:
+    """Test coalescing and result fan-out."""
+
+    def test_concurrent_calls_share_one_request(self):
+        """Test concurrent embed calls coalesce into one create call."""
+        fake = _FakeEmbeddings()
+        batcher = _batcher(fake, window_ms=50)
+
+        async def run():
+            return await asyncio.gather(
+                batcher.embed(["t1", "t2"], "m"),
+                batcher.embed(["t3"], "m"),
+                batcher.embed(["t4", "t5", "t6"], "m"),
+            )
+
+        results = asyncio.run(run())
+        assert fake.calls == [("m", ["t1", "t2", "t3", "t4", "t5", "t6"])]
+        assert results == [
+            [[1.0, 1.0], [2.0, 2.0]],
+            [[3.0, 3.0]],
+            [[4.0, 4.0], [5.0, 5.0], [6.0, 6.0]],
+        ]
+
+    def test_one_request_per_model(self):
+        """Test callers using different models are dispatched separately."""
+        fake = _FakeEmbeddings()
+        batcher = _batcher(fake, window_ms=50)
+
+        async def run():
+            return await asyncio.gather(
+                batcher.embed(["t1"], "a"),
+                batcher.embed(["t2"], "b"),
+                batcher.embed(["t3"], "a"),
+            )
+
+        results = asyncio.run(run())
+        assert sorted(fake.calls) == [("a", ["t1", "t3"]), ("b", ["t2"])]
+        assert results == [[[1.0, 1.0]], [[2.0, 2.0]], [[3.0, 3.0]]]
+
+    def test_error_reaches_every_waiter(self):
+        """Test a failed request raises in every caller of the batch."""
+        fake = _FakeEmbeddings(error=RuntimeError("boom"))
+        batcher = _batcher(fake, window_ms=50)
+
+        async def run():
+            return await asyncio.gather(
+                batcher.embed(["t1"], "m"),
+                batcher.embed(["t2"], "m"),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(run())
+        assert len(fake.calls) == 1
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    def test_max_batch_flushes_early(self):
+        """Test the window closes once max_batch texts are pending."""
+        fake = _FakeEmbeddings()
+        batcher = _batcher(fake, window_ms=10_000, max_batch=2)
+
+        async def run():
+            return await asyncio.wait_for(batcher.embed(["t1", "t2"], "m"), 1.0)
+
+        assert asyncio.run(run()) == [[1.0, 1.0], [2.0, 2.0]]
+
+    def test_slow_call_does_not_block_next_window(self):
+        """Test a later batch is dispatched while an earlier one is in flight."""
+        fake = _FakeEmbeddings(delay=0.2)
+        batcher = _batcher(fake, window_ms=10)
+
+        async def run():
+            first = asyncio.ensure_future(batcher.embed(["t1"], "m"))
+            await asyncio.sleep(0.05)
+            second = await batcher.embed(["t2"], "m")
+            return await first, second
+
+        assert asyncio.run(run()) == ([[1.0, 1.0]], [[2.0, 2.0]])
+        assert fake.calls == [("m", ["t1"]), ("m", ["t2"])]
+        assert fake.max_in_flight == 2
+
+    def test_concurrency_is_bounded(self):
+        """Test no more than max_concurrency calls are in flight."""
+        fake = _FakeEmbeddings(delay=0.05)
+        batcher = _batcher(fake, window_ms=1, max_concurrency=1)
+
+        async def run():
+            return await asyncio.gather(
+                *(batcher.embed([f"t{i}"], f"m{i}") for i in range(3))
+            )
+
+        assert asyncio.run(run()) == [[[0.0, 0.0]], [[1.0, 1.0]], [[2.0, 2.0]]]
+        assert fake.max_in_flight == 1
+
+    def test_timeout_fails_waiters(self):
+        """Test a call exceeding the timeout raises in its callers."""
+        fake = _FakeEmbeddings(delay=1.0)
+        batcher = _batcher(fake, window_ms=1, timeout=0.05)
+
+        async def run():
+            return await asyncio.gather(
+                batcher.embed(["t1"], "m"),
+                batcher.embed(["t2"], "m"),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(run())
+        assert all(isinstance(r, asyncio.TimeoutError) for r in results)
+        assert fake.timeouts == [0.05]
+
+    def test_empty_input(self):
+        """Test no request is made for an empty list."""
+        fake = _FakeEmbeddings()
+        assert asyncio.run(_batcher(fake).embed([], "m")) == []
+        assert fake.calls == []
+
+
+class TestEmbeddingCache:
+    """Test LRU eviction."""
+
+    def test_evicts_least_recently_used(self):
+        """Test reads refresh recency and the oldest entry is evicted."""
+        cache = EmbeddingCache(maxsize=2)
+        cache.put("a", np.array([1.0]))
+        cache.put("b", np.array([2.0]))
+        assert cache.get("a") is not None  # "b" is now least recent
+        cache.put("c", np.array([3.0]))
+
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+
+    def test_put_existing_key_refreshes(self):
+        """Test overwriting a key makes it most recent."""
+        cache = EmbeddingCache(maxsize=2)
+        cache.put("a", np.array([1.0]))
+        cache.put("b", np.array([2.0]))
+        cache.put("a", np.array([9.0]))
+        cache.put("c", np.array([3.0]))
+
+        assert cache.get("b") is None
+        assert cache.get("a")[0] == 9.0
+
+
+class TestInt8Quantization:
+    """Test the quantize/dequantize round trip."""
+
+    def test_round_trip_within_one_step(self):
+        """Test values come back within half a quantization step."""
+        rng = np.random.default_rng(0)
+        vec = rng.standard_normal(1536).astype(np.float32)
+        data, scale = quantize_int8(vec)
+
+        assert len(data) == vec.size
+        restored = dequantize_int8(data, scale)
+        assert restored.dtype == np.float32
+        assert np.max(np.abs(restored - vec)) <= scale / 2 + 1e-6
+
+    def test_extreme_maps_to_127(self):
+        """Test the largest magnitude uses the full int8 range."""
+        data, _ = quantize_int8(np.array([-2.0, 1.0], dtype=np.float32))
+        assert np.frombuffer(data, dtype=np.int8).tolist() == [-127, 64]
+
+    def test_all_zero_vector(self):
+        """Test a zero vector uses scale 1.0 and round-trips to zeros."""
+        data, scale = quantize_int8(np.zeros(8, dtype=np.float32))
+        assert scale == 1.0
+        assert np.array_equal(dequantize_int8(data, scale), np.zeros(8, dtype=np.float32))
+
+    def test_accepts_memoryview(self):
+        """Test dequantize reads bytea values returned as memoryview."""
+        vec = np.array([0.5, -0.25], dtype=np.float32)
+        data, scale = quantize_int8(vec)
+        assert np.allclose(dequantize_int8(memoryview(data), scale), vec, atol=scale)
+
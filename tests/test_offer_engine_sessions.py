@@ -0,0 +1,47 @@
+"""Tests for per-request session views over the offer engine singletons."""
+
+from datetime import date
+
+import pytest
+
+from app import offer_engine
+
+
+@pytest.fixture(autouse=True)
+def fresh_singletons(monkeypatch):
+    monkeypatch.setenv("SIMULATION_MODE", "true")
+    offer_engine.reset_singletons()
+    yield
+    offer_engine.reset_singletons()
+
+
+class TestSessionViews:
+    """Requests get their own session without rebinding the shared instances."""
+
+    def test_time_service_view_keeps_shared_unbound(self):
+        """Test a view holds its session and the singleton stays unbound."""
+        view = offer_engine.get_time_service("session-a")
+        assert view.db == "session-a"
+        assert offer_engine.get_time_service().db is None
+
+    def test_views_share_the_clock(self):
+        """Test starting the simulation through one view is seen by another."""
+        shared = offer_engine.get_time_service()
+        view = shared.for_session(None)
+        view.start_simulation(date(2024, 1, 1))
+
+        assert shared.is_simulation_active()
+        assert offer_engine.get_time_service("session-b").get_simulated_date() is not None
+
+    def test_scheduler_view_components_use_its_session(self):
+        """Test every component of a scheduler view uses the view's session."""
+        a = offer_engine.get_scheduler("session-a")
+        b = offer_engine.get_scheduler("session-b")
+
+        for scheduler, db in ((a, "session-a"), (b, "session-b")):
+            assert scheduler.db == db
+            assert scheduler.time_service.db == db
+            assert scheduler.expiration_handler.db == db
+            assert scheduler.cycle_manager.db == db
+            assert scheduler.offer_assigner.db == db
+        assert offer_engine.get_scheduler().db is None
@@ -0,0 +1,116 @@
+"""Tests for the asyncpg parameter rewrite and session fallback in app.pg_pool."""
+
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import asyncpg as asyncpg_dialect
+
+from app import pg_pool
+from app.offer_engine.routes import SIMULATION_STATS_SQL, WALLET_SQL
+from app.pg_pool import to_asyncpg
+
+
+def _compile_like_session(query: str):
+    """What text() + the asyncpg dialect send for the same SQL."""
+    compiled = text(query).compile(dialect=asyncpg_dialect.dialect())
+    return str(compiled), tuple(compiled.positiontup)
+
+
+class TestToAsyncpg:
+    """Test ":name" -> "$n" rewriting."""
+
+    def test_simple(self):
+        """Test parameters are numbered in order of first use."""
+        assert to_asyncpg("SELECT * FROM t WHERE a = :a AND b = :b") == (
+            "SELECT * FROM t WHERE a = $1 AND b = $2",
+            ("a", "b"),
+        )
+
+    def test_repeated_name_reuses_position(self):
+        """Test a repeated name maps to the same $n and is passed once."""
+        assert to_asyncpg("SELECT :x, :y WHERE z = :x") == (
+            "SELECT $1, $2 WHERE z = $1",
+            ("x", "y"),
+        )
+
+    def test_column_cast_untouched(self):
+        """Test "::type" casts on columns are not parameters."""
+        assert to_asyncpg("SELECT id::text FROM t WHERE u = :u") == (
+            "SELECT id::text FROM t WHERE u = $1",
+            ("u",),
+        )
+
+    def test_literal_with_colon(self):
+        """Test colons inside literals such as times are left alone."""
+        assert to_asyncpg("SELECT '12:30'::time, :p") == (
+            "SELECT '12:30'::time, $1",
+            ("p",),
+        )
+
+    def test_cast_function_binds(self):
+        """Test CAST(:name AS type) is the supported way to type a parameter."""
+        assert to_asyncpg("SELECT ANY(CAST(:ids AS uuid[]))") == (
+            "SELECT ANY(CAST($1 AS uuid[]))",
+            ("ids",),
+        )
+
+    def test_double_colon_cast_on_bind_rejected(self):
+        """Test ":name::type" is rejected: text() would not bind it."""
+        with pytest.raises(ValueError, match="CAST"):
+            to_asyncpg("SELECT * FROM t WHERE id = ANY(:ids::uuid[])")
+
+    def test_escaped_colon(self):
+        """Test an escaped colon becomes a literal colon, as with text()."""
+        assert to_asyncpg(r"SELECT '\:a', :b") == ("SELECT ':a', $1", ("b",))
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "SELECT * FROM t WHERE a = :a AND b = :b OR a2 = :a",
+        "SELECT '12:30', x::text FROM t WHERE id = :id",
+        "SELECT ANY(CAST(:ids AS uuid[])), :limit",
+        r"SELECT '\:a', :b",
+        WALLET_SQL,
+        SIMULATION_STATS_SQL,
+    ],
+)
+def test_parity_with_text(query):
+    """Test the pool sends the same SQL and parameter order as the session path."""
+    assert to_asyncpg(query) == _compile_like_session(query)
+
+
+class _Session:
+    """Sync session stand-in recording what fetch sends to it."""
+
+    def __init__(self):
+        self.calls = []
+
+    def execute(self, statement, params):
+        self.calls.append((str(statement), params))
+        return self
+
+    def fetchall(self):
+        return [("row",)]
+
+
+class TestFetchFallback:
+    """Test fetch uses the session when the async engine is not available."""
+
+    def test_unconfigured_uses_session(self, monkeypatch):
+        """Test no engine is created without a database URL."""
+        monkeypatch.setattr(pg_pool, "_database_url", None)
+        db = _Session()
+        rows = asyncio.run(pg_pool.fetch(db, "SELECT :a", {"a": 1}))
+        assert rows == [("row",)]
+        assert db.calls == [("SELECT :a", {"a": 1})]
+        assert pg_pool._async_engine is None
+
+    def test_recent_failure_skips_engine(self, monkeypatch):
+        """Test the engine is skipped for the retry window after a failure."""
+        monkeypatch.setattr(pg_pool, "_database_url", "postgresql://u@h/db")
+        monkeypatch.setattr(pg_pool, "_pool_failed_at", time.monotonic())
+        monkeypatch.setattr(pg_pool, "get_async_engine", pytest.fail)
+        assert pg_pool._fetch_engine() is None
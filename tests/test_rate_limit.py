@@ -0,0 +1,93 @@
+"""Tests for the sliding-window rate limiter."""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.rate_limit import RateLimiter, parse_rate
+
+
+class TestParseRate:
+    """Test rate string parsing."""
+
+    def test_parse_minute(self):
+        """Test parsing a per-minute rate."""
+        assert parse_rate("30/minute") == (30, 60_000)
+
+    def test_parse_plural_period(self):
+        """Test plural periods are accepted."""
+        assert parse_rate("5/seconds") == (5, 1_000)
+
+    def test_parse_invalid(self):
+        """Test invalid rates raise ValueError."""
+        with pytest.raises(ValueError):
+            parse_rate("thirty per minute")
+
+
+class TestRateLimiter:
+    """Test the in-process fallback window (no REDIS_URL)."""
+
+    def _client(self, rate: str) -> TestClient:
+        app = FastAPI()
+        limiter = RateLimiter()
+
+        @app.get("/limited")
+        @limiter.limit(rate)
+        async def limited(request: Request, q: int = 0):
+            return {"q": q}
+
+        return TestClient(app)
+
+    def test_allows_up_to_limit(self):
+        """Test requests within the limit pass through with their params."""
+        client = self._client("2/minute")
+        assert client.get("/limited?q=1").json() == {"q": 1}
+        assert client.get("/limited?q=2").status_code == 200
+
+    def test_rejects_over_limit(self):
+        """Test the request after the limit gets a 429 with Retry-After."""
+        client = self._client("2/minute")
+        client.get("/limited")
+        client.get("/limited")
+        response = client.get("/limited")
+        assert response.status_code == 429
+        assert int(response.headers["retry-after"]) >= 1
+
+    def test_window_slides(self):
+        """Test hits older than the window no longer count."""
+        limiter = RateLimiter()
+        assert asyncio.run(limiter.hit("k", 1, 60_000))[0] is True
+        assert asyncio.run(limiter.hit("k", 1, 60_000))[0] is False
+        limiter._local["k"][0] -= 60_000
+        assert asyncio.run(limiter.hit("k", 1, 60_000))[0] is True
+
+    def test_idle_keys_are_swept(self):
+        """Test keys with no hits inside the window are evicted."""
+        limiter = RateLimiter()
+        asyncio.run(limiter.hit("old", 1, 60_000))
+        limiter._local["old"][0] -= 60_000
+        limiter._last_sweep_ms = 0
+        asyncio.run(limiter.hit("new", 1, 60_000))
+        assert list(limiter._local) == ["new"]
+
+
+class TestRedisFallback:
+    """Test Redis errors switch the limiter to the local window for a while."""
+
+    def test_skips_redis_after_error(self):
+        """Test a failed script call is not retried within the cooldown."""
+        calls = []
+
+        async def failing_script(keys, args):
+            calls.append(keys)
+            raise ConnectionError("redis down")
+
+        limiter = RateLimiter("redis://localhost:6379")
+        limiter._script = failing_script
+
+        assert asyncio.run(limiter.hit("k", 5, 60_000)) == (True, 0)
+        assert asyncio.run(limiter.hit("k", 5, 60_000)) == (True, 0)
+        assert len(calls) == 1
+        assert len(limiter._local["k"]) == 2
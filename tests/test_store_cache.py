@@ -0,0 +1,86 @@
+"""Tests for the selected-store cache (no REDIS_URL)."""
+
+import asyncio
+
+import pytest
+
+from app import store_cache
+
+
+class _Result:
+    def __init__(self, row):
+        self._row = row
+
+    def fetchone(self):
+        return self._row
+
+
+class _Session:
+    """Sync session stand-in that counts queries."""
+
+    def __init__(self, store_id):
+        self.store_id = store_id
+        self.calls = 0
+
+    def execute(self, statement, params):
+        self.calls += 1
+        return _Result((self.store_id,) if self.store_id else None)
+
+
+class _AsyncSession(_Session):
+    async def execute(self, statement, params):
+        return _Session.execute(self, statement, params)
+
+
+@pytest.fixture(autouse=True)
+def no_redis(monkeypatch):
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    store_cache._local_cache.clear()
+    yield
+    store_cache._local_cache.clear()
+
+
+class TestWithoutRedis:
+    """Without Redis there is no invalidation channel, so nothing is cached."""
+
+    def test_sync_lookup_reads_database_each_time(self):
+        db = _Session("store-1")
+        assert store_cache.get_user_store_id(db, "u1") == "store-1"
+        assert store_cache.get_user_store_id(db, "u1") == "store-1"
+        assert db.calls == 2
+        assert store_cache._local_cache == {}
+
+    def test_async_lookup_sees_changed_selection(self):
+        db = _AsyncSession("store-1")
+        assert asyncio.run(store_cache.get_user_store_id_async(db, "u1")) == "store-1"
+        db.store_id = "store-2"
+        assert asyncio.run(store_cache.get_user_store_id_async(db, "u1")) == "store-2"
+
+    def test_no_selection(self):
+        assert store_cache.get_user_store_id(_Session(None), "u1") is None
+
+    def test_invalidate_is_a_noop(self):
+        asyncio.run(store_cache.invalidate_user_store_id("u1"))
+
+
+class TestLocalCache:
+    """The per-worker copy is only trusted while invalidations are received."""
+
+    def test_put_ignored_when_not_listening(self, monkeypatch):
+        monkeypatch.setattr(store_cache, "_listening", False)
+        store_cache._local_put("u1", "store-1")
+        assert store_cache._local_get("u1") is None
+
+    def test_entry_served_until_expiry(self, monkeypatch):
+        monkeypatch.setattr(store_cache, "_listening", True)
+        store_cache._local_put("u1", "store-1")
+        assert store_cache._local_get("u1") == "store-1"
+        monkeypatch.setattr(store_cache, "LOCAL_TTL_SECONDS", -1.0)
+        store_cache._local_put("u1", "store-1")
+        assert store_cache._local_get("u1") is None
+
+    def test_invalidate_drops_local_entry(self, monkeypatch):
+        monkeypatch.setattr(store_cache, "_listening", True)
+        store_cache._local_put("u1", "store-1")
+        asyncio.run(store_cache.invalidate_user_store_id("u1"))
+        assert store_cache._local_get("u1") is None